@@ -1,21 +1,76 @@
 
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 import re
 
+from .records import Chunk, Relation
+
+
+# =========================================================
+# Detection patterns
+#
+# Compiled once, and combined so each chunk's code is scanned a
+# single time per side. Matches are grouped back by pattern, so
+# results keep the order the separate per-pattern scans produced.
+# =========================================================
+FRONTEND_CALL = re.compile(
+    r"fetch\s*\(\s*['\"](?P<fetch_route>[^'\"]+)['\"]"
+    r"|(?i:axios\.(?P<axios_method>get|post|put|delete|patch)\s*\(\s*['\"](?P<axios_route>[^'\"]+)['\"])"
+    r"|(?i:apiClient\.(?P<client_method>get|post|put|delete|patch|call)\s*\(\s*['\"](?P<client_route>[^'\"]+)['\"])"
+)
+
+FETCH_METHOD = re.compile(r"method\s*:\s*['\"](\w+)['\"]", re.IGNORECASE)
+
+SPRING_METHODS = {
+    "GetMapping": "GET",
+    "PostMapping": "POST",
+    "PutMapping": "PUT",
+    "DeleteMapping": "DELETE",
+    "PatchMapping": "PATCH",
+    "RequestMapping": "unknown",
+}
+
+# Annotations/decorators as stored on chunks (anchored with .match)
+SPRING_DECORATOR = re.compile(
+    r"@(GetMapping|PostMapping|PutMapping|DeleteMapping|PatchMapping)\s*\(\s*['\"]([^'\"]*)['\"]"
+)
+FLASK_DECORATOR = re.compile(
+    r"@(?:app|router)\.(get|post|put|delete|patch)\s*\(\s*['\"]([^'\"]*)['\"]",
+    re.IGNORECASE
+)
+
+# Fallback scans over chunk code
+SPRING_MAPPING = re.compile(
+    r"@(GetMapping|PostMapping|PutMapping|DeleteMapping|PatchMapping|RequestMapping)"
+    r"\s*\(\s*['\"]([^'\"]*)['\"]"
+)
+PYTHON_ROUTE = re.compile(
+    r"@(?:(?P<owner>app|router)\.(?P<method>get|post|put|delete|patch)|blueprint\.route)"
+    r"\s*\(\s*['\"](?P<route>[^'\"]*)['\"]",
+    re.IGNORECASE
+)
+BLUEPRINT_METHODS = re.compile(r"methods\s*=\s*\[?\s*['\"](\w+)['\"]", re.IGNORECASE)
+
 
 def infer_frontend_backend_bridges(
-    all_chunks: List[dict],
-    all_relations: List[dict]
-) -> List[dict]:
+    all_chunks: List[Chunk],
+    all_relations: List[Relation],
+    api_usage: Optional[List[Tuple[List[Dict], List[Dict]]]] = None
+) -> List[Relation]:
+    """
+    api_usage: per-file (frontend_apis, backend_endpoints) as returned
+    by detect_api_usage in the parse workers, in chunk order. Detected
+    here from all_chunks when not given.
+    """
     
     if not all_chunks or not all_relations:
         return []
     
-    # Phase 1: Extract frontend API calls
-    frontend_apis = _detect_frontend_api_calls(all_chunks)
+    if api_usage is None:
+        api_usage = [detect_api_usage(all_chunks)]
     
-    # Phase 2: Extract backend entry points
-    backend_endpoints = _detect_backend_entry_points(all_chunks)
+    # Phase 1 + 2: frontend API calls and backend entry points
+    frontend_apis = [api for apis, _ in api_usage for api in apis]
+    backend_endpoints = [endpoint for _, endpoints in api_usage for endpoint in endpoints]
     
     # Phase 3: Match frontend calls to backend endpoints
     bridge_relations = _match_api_calls_to_endpoints(
@@ -26,57 +81,65 @@ def infer_frontend_backend_bridges(
     return bridge_relations
 
 
-def _detect_frontend_api_calls(all_chunks: List[dict]) -> List[Dict]:
+def detect_api_usage(chunks: List[Chunk]) -> Tuple[List[Dict], List[Dict]]:
+    """(frontend_apis, backend_endpoints) found in `chunks`."""
+    return _detect_frontend_api_calls(chunks), _detect_backend_entry_points(chunks)
+
+
+def _detect_frontend_api_calls(all_chunks: List[Chunk]) -> List[Dict]:
     frontend_apis = []
     
     for chunk in all_chunks:
         # Only process JavaScript/TypeScript chunks
-        if chunk.get("language") not in ("javascript", "typescript"):
+        if chunk.language not in ("javascript", "typescript"):
             continue
         
-        code = chunk.get("code", "")
+        code = chunk.code
         if not code:
             continue
         
-        caller_name = chunk.get("name", "unknown")
-        file_path = chunk.get("file_path", "")
+        caller_name = chunk.name or "unknown"
+        file_path = chunk.file_path or ""
         
-        # Pattern 1: fetch('route') or fetch("route")
-        for match in re.finditer(r"fetch\s*\(\s*['\"]([^'\"]+)['\"]", code):
-            route = match.group(1)
-            method = _infer_fetch_method(code, match.start())
-            
-            frontend_apis.append({
+        def api(route, method, api_type):
+            return {
                 "caller": caller_name,
+                "caller_hash": chunk.hash,
                 "file_path": file_path,
                 "route": route,
-                "http_method": method or "unknown",
-                "api_type": "fetch",
-                "chunk_type": chunk.get("type", "function")
-            })
+                "http_method": method,
+                "api_type": api_type,
+                "chunk_type": chunk.type or "function"
+            }
         
-        # Pattern 2: axios.get/post/put/delete/patch('route')
-        for match in re.finditer(r"axios\.(get|post|put|delete|patch)\s*\(\s*['\"]([^'\"]+)['\"]", code, re.IGNORECASE):
-            frontend_apis.append({
-                "caller": caller_name,
-                "file_path": file_path,
-                "route": match.group(2),
-                "http_method": match.group(1).upper(),
-                "api_type": "axios",
-                "chunk_type": chunk.get("type", "function")
-            })
+        fetches, axios_calls, client_calls = [], [], []
         
-        # Pattern 3: apiClient.get/post/put/delete/patch/call('route')
-        for match in re.finditer(r"apiClient\.(get|post|put|delete|patch|call)\s*\(\s*['\"]([^'\"]+)['\"]", code, re.IGNORECASE):
-            method = "unknown" if match.group(1) == "call" else match.group(1).upper()
-            frontend_apis.append({
-                "caller": caller_name,
-                "file_path": file_path,
-                "route": match.group(2),
-                "http_method": method,
-                "api_type": "apiClient",
-                "chunk_type": chunk.get("type", "function")
-            })
+        for match in FRONTEND_CALL.finditer(code):
+            # Pattern 1: fetch('route') or fetch("route")
+            if match.group("fetch_route"):
+                method = _infer_fetch_method(code, match.start())
+                fetches.append(api(match.group("fetch_route"), method or "unknown", "fetch"))
+            
+            # Pattern 2: axios.get/post/put/delete/patch('route')
+            elif match.group("axios_route"):
+                axios_calls.append(api(
+                    match.group("axios_route"),
+                    match.group("axios_method").upper(),
+                    "axios"
+                ))
+            
+            # Pattern 3: apiClient.get/post/put/delete/patch/call('route')
+            else:
+                method = match.group("client_method")
+                client_calls.append(api(
+                    match.group("client_route"),
+                    "unknown" if method == "call" else method.upper(),
+                    "apiClient"
+                ))
+        
+        frontend_apis.extend(fetches)
+        frontend_apis.extend(axios_calls)
+        frontend_apis.extend(client_calls)
     
     return frontend_apis
 
@@ -86,12 +149,11 @@ def _infer_fetch_method(code: str, pos: int) -> Optional[str]:
     Infer HTTP method from fetch call context (conservative).
     Only returns method if explicitly set in options.
     """
-    lookahead = code[pos:min(pos + 500, len(code))]
-    match = re.search(r"method\s*:\s*['\"](\w+)['\"]", lookahead, re.IGNORECASE)
+    match = FETCH_METHOD.search(code, pos, min(pos + 500, len(code)))
     return match.group(1).upper() if match else None
 
 
-def _detect_backend_entry_points(all_chunks: List[dict]) -> List[Dict]:
+def _detect_backend_entry_points(all_chunks: List[Chunk]) -> List[Dict]:
     """
     Detect backend API entry points from Python and Java chunks.
     Uses stored decorators/annotations first, then regex as fallback.
@@ -99,18 +161,18 @@ def _detect_backend_entry_points(all_chunks: List[dict]) -> List[Dict]:
     backend_endpoints = []
     
     for chunk in all_chunks:
-        language = chunk.get("language")
+        language = chunk.language
         if language not in ("python", "java"):
             continue
         
-        code = chunk.get("code", "")
+        code = chunk.code
         if not code:
             continue
         
-        handler_name = chunk.get("name", "unknown")
-        file_path = chunk.get("file_path", "")
-        params = chunk.get("params", [])
-        decorators = chunk.get("decorators", [])
+        handler_name = chunk.name or "unknown"
+        file_path = chunk.file_path or ""
+        params = chunk.params or []
+        decorators = chunk.decorators or []
         
         # Extract from decorators/annotations first (metadata)
         if decorators:
@@ -139,37 +201,20 @@ def _parse_decorator_to_endpoint(
     Supports Spring Boot (@GetMapping, etc) and Flask/FastAPI (@app.get, etc).
     """
     # Spring Boot patterns: @GetMapping, @PostMapping, etc
-    spring_patterns = {
-        "GetMapping": "GET",
-        "PostMapping": "POST",
-        "PutMapping": "PUT",
-        "DeleteMapping": "DELETE",
-        "PatchMapping": "PATCH",
-    }
-    
-    for mapping_name, http_method in spring_patterns.items():
-        pattern = rf"@{mapping_name}\s*\(\s*['\"]([^'\"]*)['\"]"
-        match = re.match(pattern, decorator)
-        if match:
-            return {
-                "handler": handler_name,
-                "file_path": file_path,
-                "route": match.group(1) or "/",
-                "http_method": http_method,
-                "language": language,
-                "params": params
-            }
+    match = SPRING_DECORATOR.match(decorator)
+    if match:
+        return {
+            "handler": handler_name,
+            "file_path": file_path,
+            "route": match.group(2) or "/",
+            "http_method": SPRING_METHODS[match.group(1)],
+            "language": language,
+            "params": params
+        }
     
     # Flask/FastAPI patterns: @app.get, @router.post, etc
-    flask_patterns = [
-        (r"@app\.(get|post|put|delete|patch)\s*\(\s*['\"]([^'\"]*)['\"]", "python"),
-        (r"@router\.(get|post|put|delete|patch)\s*\(\s*['\"]([^'\"]*)['\"]", "python"),
-    ]
-    
-    for pattern, lang in flask_patterns:
-        if language != lang:
-            continue
-        match = re.match(pattern, decorator, re.IGNORECASE)
+    if language == "python":
+        match = FLASK_DECORATOR.match(decorator)
         if match:
             return {
                 "handler": handler_name,
@@ -194,62 +239,56 @@ def _scan_code_for_endpoints(
     Scan code for endpoint patterns (fallback if decorators not available).
     Avoids duplicate extraction by only finding patterns not already in decorators.
     """
-    endpoints = []
+    def endpoint(route, method):
+        return {
+            "handler": handler_name,
+            "file_path": file_path,
+            "route": route,
+            "http_method": method,
+            "language": language,
+            "params": params
+        }
     
     if language == "java":
         # Spring mappings: @GetMapping, @PostMapping, etc
-        for mapping_name, http_method in [
-            ("GetMapping", "GET"),
-            ("PostMapping", "POST"),
-            ("PutMapping", "PUT"),
-            ("DeleteMapping", "DELETE"),
-            ("PatchMapping", "PATCH"),
-            ("RequestMapping", "unknown"),
-        ]:
-            pattern = rf"@{mapping_name}\s*\(\s*['\"]([^'\"]*)['\"]"
-            for match in re.finditer(pattern, code):
-                endpoints.append({
-                    "handler": handler_name,
-                    "file_path": file_path,
-                    "route": match.group(1) or "/",
-                    "http_method": http_method,
-                    "language": "java",
-                    "params": params
-                })
+        found = {name: [] for name in SPRING_METHODS}
+        
+        for match in SPRING_MAPPING.finditer(code):
+            found[match.group(1)].append(
+                endpoint(match.group(2) or "/", SPRING_METHODS[match.group(1)])
+            )
+        
+        return [e for endpoints in found.values() for e in endpoints]
     
-    elif language == "python":
-        # Flask/FastAPI app.get/post/etc
-        for pattern, http_method in [
-            (r"@app\.(get|post|put|delete|patch)\s*\(\s*['\"]([^'\"]*)['\"]", None),
-            (r"@router\.(get|post|put|delete|patch)\s*\(\s*['\"]([^'\"]*)['\"]", None),
-            (r"@blueprint\.route\s*\(\s*['\"]([^'\"]*)['\"]", "unknown"),
-        ]:
-            for match in re.finditer(pattern, code, re.IGNORECASE):
-                method = http_method if http_method else match.group(1).upper()
-                
+    if language == "python":
+        # Flask/FastAPI app.get/post/etc, router.*, blueprint.route
+        found = {"app": [], "router": [], "blueprint": []}
+        
+        for match in PYTHON_ROUTE.finditer(code):
+            owner = match.group("owner")
+            
+            if owner:
+                method = match.group("method").upper()
+            else:
                 # For blueprint.route, try to extract methods parameter
-                if http_method == "unknown":
-                    lookahead = code[match.start():min(match.start() + 300, len(code))]
-                    methods_match = re.search(r"methods\s*=\s*\[?\s*['\"](\w+)['\"]", lookahead, re.IGNORECASE)
-                    if methods_match:
-                        method = methods_match.group(1).upper()
-                
-                endpoints.append({
-                    "handler": handler_name,
-                    "file_path": file_path,
-                    "route": match.group(2) if "blueprint" not in pattern else match.group(1),
-                    "http_method": method or "unknown",
-                    "language": "python",
-                    "params": params
-                })
+                methods_match = BLUEPRINT_METHODS.search(
+                    code, match.start(), min(match.start() + 300, len(code))
+                )
+                method = methods_match.group(1).upper() if methods_match else "unknown"
+            
+            found[owner.lower() if owner else "blueprint"].append(
+                endpoint(match.group("route"), method)
+            )
+        
+        return [e for endpoints in found.values() for e in endpoints]
     
-    return endpoints
+    return []
 
 
 def _match_api_calls_to_endpoints(
     frontend_apis: List[Dict],
     backend_endpoints: List[Dict]
-) -> List[Dict]:
+) -> List[Relation]:
     """
     Match frontend API calls to backend endpoints using conservative strategy.
     
@@ -262,22 +301,20 @@ def _match_api_calls_to_endpoints(
     bridge_relations = []
     seen_pairs = set()
     
+    route_index = RouteIndex(backend_endpoints)
+    
     for api_call in frontend_apis:
         best_match = None
         best_confidence = 0
         
-        for endpoint in backend_endpoints:
+        # Only endpoints whose route matches, in endpoint order
+        for i in route_index.candidates(api_call["route"]):
+            endpoint = backend_endpoints[i]
+            
             edge_key = (api_call["caller"], endpoint["handler"])
             if edge_key in seen_pairs:
                 continue
             
-            # Calculate confidence score
-            route_match = (api_call["route"] == endpoint["route"] or 
-                          _routes_similar(api_call["route"], endpoint["route"]))
-            
-            if not route_match:
-                continue
-            
             # Route matches; now check HTTP method
             confidence = 0.5
             
@@ -298,46 +335,76 @@ def _match_api_calls_to_endpoints(
         
         # Create bridge only if confidence is sufficient
         if best_match and best_confidence >= 0.5:
-            bridge_relations.append({
-                "from": api_call["caller"],
-                "to": best_match["handler"],
-                "type": "http_call",
-                "language": "cross",
-                "confidence": _confidence_to_label(best_confidence),
-                "route": api_call["route"],
-                "http_method": api_call["http_method"],
-                "backend_method": best_match["http_method"],
-                "api_type": api_call["api_type"]
-            })
+            bridge_relations.append(Relation(
+                src=api_call["caller"],
+                dst=best_match["handler"],
+                type="http_call",
+                language="cross",
+                confidence=_confidence_to_label(best_confidence),
+                src_file=str(api_call["file_path"]),
+                src_hash=api_call["caller_hash"],
+                route=api_call["route"],
+                http_method=api_call["http_method"],
+                backend_method=best_match["http_method"],
+                api_type=api_call["api_type"]
+            ))
             seen_pairs.add((api_call["caller"], best_match["handler"]))
     
     return bridge_relations
 
 
-def _routes_similar(route1: str, route2: str) -> bool:
-    """
-    Check if two routes are semantically similar.
-    Handles prefix differences and parameterized routes.
-    """
-    r1 = route1.strip("/").lower()
-    r2 = route2.strip("/").lower()
-    
-    if r1 == r2:
-        return True
+# =========================================================
+# Route index
+#
+# Routes are compared as normalized segment tuples: slashes trimmed,
+# lowercased, parameter placeholders ({id}, :id) collapsed to one
+# token. Two routes match when they are equal or one is a suffix of
+# the other (a prefix such as /api added on one side only). Backend
+# routes are indexed once by every suffix, so matching a frontend
+# call is a few dict lookups instead of a scan over all endpoints.
+# =========================================================
+BRACE_PARAM = re.compile(r"\{[^}]+\}")
+
+
+def _route_segments(route: str) -> tuple:
+    segments = []
     
-    # Check if one is a suffix of the other (prefix difference)
-    parts1, parts2 = r1.split("/"), r2.split("/")
+    for part in route.strip("/").lower().split("/"):
+        part = BRACE_PARAM.sub(":param", part)
+        if part.startswith(":"):
+            part = ":param"
+        segments.append(part)
     
-    if len(parts1) > len(parts2) and parts1[-len(parts2):] == parts2:
-        return True
-    if len(parts2) > len(parts1) and parts2[-len(parts1):] == parts1:
-        return True
+    return tuple(segments)
+
+
+class RouteIndex:
     
-    # Handle parametrized routes: /user/{id} == /user/:id
-    param1 = re.sub(r"\{[^}]+\}", ":param", r1)
-    param2 = re.sub(r"\{[^}]+\}", ":param", r2)
+    def __init__(self, endpoints: List[Dict]):
+        # Full route → endpoint indices
+        self._exact = {}
+        # Every suffix of a route (the full route included) → indices
+        self._by_suffix = {}
+        
+        for i, endpoint in enumerate(endpoints):
+            segments = _route_segments(endpoint["route"])
+            self._exact.setdefault(segments, []).append(i)
+            
+            for start in range(len(segments)):
+                self._by_suffix.setdefault(segments[start:], []).append(i)
     
-    return param1 == param2
+    def candidates(self, route: str) -> List[int]:
+        """Indices of endpoints whose route matches `route`, ascending."""
+        segments = _route_segments(route)
+        
+        # Endpoint routes equal to, or ending with, this route
+        found = set(self._by_suffix.get(segments, ()))
+        
+        # Endpoint routes this route ends with
+        for start in range(1, len(segments)):
+            found.update(self._exact.get(segments[start:], ()))
+        
+        return sorted(found)
 
 
 def _confidence_to_label(confidence: float) -> str:
@@ -0,0 +1,89 @@
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import List
+
+from langchain_core.documents import Document
+
+
+# =========================================================
+# Chunk store
+#
+# Key/value table of chunk hash → (source, metadata), written next to
+# the Chroma collection at ingestion time. Fetching the chunks of a
+# graph walk is a primary-key lookup instead of a metadata scan.
+# =========================================================
+def get_chunk_store_path(repo_hash: str) -> Path:
+    return Path(f"RepoMind/db/chunk_store/{repo_hash}.sqlite")
+
+
+class ChunkStore:
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            self.path,
+            check_same_thread=False,
+            timeout=30
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS chunks ("
+            "hash TEXT PRIMARY KEY, content TEXT, metadata TEXT)"
+        )
+
+    def put_documents(self, docs: List[Document]):
+        rows = [
+            (
+                doc.metadata["hash"],
+                doc.page_content,
+                json.dumps(doc.metadata, default=str)
+            )
+            for doc in docs
+        ]
+
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO chunks VALUES (?, ?, ?)",
+                rows
+            )
+            self._conn.commit()
+
+    def delete_hashes(self, hashes: List[str]):
+        with self._lock:
+            self._conn.executemany(
+                "DELETE FROM chunks WHERE hash = ?",
+                [(h,) for h in hashes]
+            )
+            self._conn.commit()
+
+    def get_chunks(self, hashes: List[str]) -> List[Document]:
+        """
+        Documents for the given chunk hashes, in request order.
+        Unknown hashes are skipped and duplicates returned once.
+        """
+        unique = list(dict.fromkeys(hashes))
+        found = {}
+
+        with self._lock:
+            for i in range(0, len(unique), 500):
+                part = unique[i:i + 500]
+                marks = ",".join("?" * len(part))
+
+                for chunk_hash, content, metadata in self._conn.execute(
+                    f"SELECT hash, content, metadata FROM chunks WHERE hash IN ({marks})",
+                    part
+                ):
+                    found[chunk_hash] = Document(
+                        page_content=content,
+                        metadata=json.loads(metadata)
+                    )
+
+        return [found[h] for h in unique if h in found]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,485 @@
+import json
+import mmap
+import bisect
+from array import array
+from collections import deque
+from pathlib import Path
+
+import networkx as nx
+
+
+# =========================================================
+# Compact on-disk graph
+#
+# Layout of a `.csr` file (all integers native-endian):
+#
+#   magic (8 bytes) | header length (u64) | JSON header | sections...
+#
+# Node ids are kept in a sorted string table so the node index is the
+# rank of its id and lookups are a binary search over the mapped file.
+# Adjacency is stored twice in CSR form (successors, predecessors) and
+# node/edge attributes are columns of indices into an interned string
+# table. Nothing is decoded until it is accessed, so opening a graph
+# costs one mmap regardless of its size.
+# =========================================================
+MAGIC = b"RMGRAPH1"
+
+LIST_SEP = "\x1f"
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+class _StringTable:
+    """Read-only sequence of strings backed by an offsets array and a blob."""
+
+    def __init__(self, offsets, blob):
+        self._offsets = offsets
+        self._blob = blob
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i):
+        return str(self._blob[self._offsets[i]:self._offsets[i + 1]], "utf-8")
+
+
+class _Interner:
+
+    def __init__(self):
+        self.index = {}
+        self.values = []
+
+    def add(self, value):
+        if value is None:
+            return -1
+
+        idx = self.index.get(value)
+        if idx is None:
+            idx = len(self.values)
+            self.index[value] = idx
+            self.values.append(value)
+
+        return idx
+
+    def add_all(self, values):
+        """Indices for a whole column at once."""
+        index = self.index
+        column = array("i")
+        append = column.append
+
+        for value in values:
+            if value is None:
+                append(-1)
+                continue
+
+            idx = index.get(value)
+            if idx is None:
+                idx = len(self.values)
+                index[value] = idx
+                self.values.append(value)
+
+            append(idx)
+
+        return column
+
+
+INT64_MIN, INT64_MAX = -2 ** 63, 2 ** 63 - 1
+
+
+def _is_int(value) -> bool:
+    return (
+        isinstance(value, int)
+        and not isinstance(value, bool)
+        and INT64_MIN <= value <= INT64_MAX
+    )
+
+
+def _is_list(value) -> bool:
+    return isinstance(value, (list, tuple)) and all(isinstance(v, str) for v in value)
+
+
+def _column_kind(values):
+    """
+    "int" or "list" only when every non-None value fits; anything mixed
+    is stored as strings.
+    """
+    present = [value for value in values if value is not None]
+
+    if present and all(_is_int(value) for value in present):
+        return "int"
+    if present and all(_is_list(value) for value in present):
+        return "list"
+    return "str"
+
+
+# =========================================================
+# Writing
+# =========================================================
+def write_compact_graph(path: Path, node_ids, node_attrs, edges):
+    """
+    Write a graph given
+    - node_ids: list of node id strings
+    - node_attrs: list of attribute dicts, aligned with node_ids
+    - edges: list of (src_index, dst_index, attr_dict)
+    """
+
+    order = sorted(range(len(node_ids)), key=lambda i: node_ids[i])
+    rank = [0] * len(node_ids)
+    for new, old in enumerate(order):
+        rank[old] = new
+
+    edges = sorted(
+        ((rank[u], rank[v], attrs) for u, v, attrs in edges),
+        key=lambda e: (e[0], e[1])
+    )
+
+    strings = _Interner()
+    sections = {}
+
+    def add_strings(name, values):
+        offsets = array("Q", [0])
+        blob = bytearray()
+        for value in values:
+            blob += value.encode("utf-8")
+            offsets.append(len(blob))
+        sections[f"{name}.offsets"] = offsets
+        sections[f"{name}.blob"] = array("B", bytes(blob))
+
+    def add_columns(prefix, rows):
+        kinds = {}
+        keys = []
+        for row in rows:
+            for key in row:
+                if key not in kinds:
+                    kinds[key] = None
+                    keys.append(key)
+
+        for key in keys:
+            values = [row.get(key) for row in rows]
+            kind = _column_kind(values)
+            kinds[key] = kind
+
+            if kind == "int":
+                column = array("q", (v if v is not None else 0 for v in values))
+            elif kind == "list":
+                column = strings.add_all(
+                    LIST_SEP.join(v) if v is not None else None
+                    for v in values
+                )
+            else:
+                column = strings.add_all(
+                    v if v is None or isinstance(v, str) else str(v)
+                    for v in values
+                )
+
+            sections[f"{prefix}.{key}"] = column
+
+        return kinds
+
+    add_strings("node_ids", [node_ids[i] for i in order])
+
+    node_kinds = add_columns("node", [node_attrs[i] for i in order])
+    edge_kinds = add_columns("edge", [attrs for _, _, attrs in edges])
+
+    # Successor CSR (edges are already sorted by source)
+    n = len(node_ids)
+    succ_offsets = array("I", [0] * (n + 1))
+    for u, _, _ in edges:
+        succ_offsets[u + 1] += 1
+    for i in range(n):
+        succ_offsets[i + 1] += succ_offsets[i]
+
+    sections["succ.offsets"] = succ_offsets
+    sections["succ.targets"] = array("I", (v for _, v, _ in edges))
+
+    # Predecessor CSR, pointing back at the edge index for attributes
+    by_target = sorted(range(len(edges)), key=lambda e: (edges[e][1], edges[e][0]))
+
+    pred_offsets = array("I", [0] * (n + 1))
+    for _, v, _ in edges:
+        pred_offsets[v + 1] += 1
+    for i in range(n):
+        pred_offsets[i + 1] += pred_offsets[i]
+
+    sections["pred.offsets"] = pred_offsets
+    sections["pred.sources"] = array("I", (edges[e][0] for e in by_target))
+    sections["pred.edges"] = array("I", by_target)
+
+    add_strings("strings", strings.values)
+
+    # Lay out sections
+    layout = {}
+    offset = 0
+    for name, data in sections.items():
+        offset = _align(offset)
+        layout[name] = [offset, data.typecode, len(data)]
+        offset += len(data) * data.itemsize
+
+    header = json.dumps({
+        "nodes": n,
+        "edges": len(edges),
+        "node_columns": node_kinds,
+        "edge_columns": edge_kinds,
+        "sections": layout,
+    }).encode("utf-8")
+
+    base = _align(len(MAGIC) + 8 + len(header))
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(len(header).to_bytes(8, "little"))
+        f.write(header)
+
+        for name, data in sections.items():
+            f.seek(base + layout[name][0])
+            data.tofile(f)
+
+    tmp_path.replace(path)
+
+
+# =========================================================
+# Reading
+# =========================================================
+class _NodeView:
+
+    def __init__(self, graph):
+        self._graph = graph
+
+    def __getitem__(self, node):
+        idx = self._graph._index(node)
+        if idx is None:
+            raise KeyError(node)
+        return self._graph._node_attrs(idx)
+
+    def get(self, node, default=None):
+        idx = self._graph._index(node)
+        return default if idx is None else self._graph._node_attrs(idx)
+
+    def __contains__(self, node):
+        return self._graph.has_node(node)
+
+    def __iter__(self):
+        return iter(self._graph)
+
+    def __len__(self):
+        return len(self._graph)
+
+
+class CompactGraph:
+    """
+    Memory-mapped, read-only graph exposing the subset of the
+    networkx DiGraph API used by the retrieval features.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+
+        with open(self.path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._mm[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"Not a compact graph file: {self.path}")
+
+        header_len = int.from_bytes(self._mm[len(MAGIC):len(MAGIC) + 8], "little")
+        header_start = len(MAGIC) + 8
+        header = json.loads(self._mm[header_start:header_start + header_len])
+
+        base = _align(header_start + header_len)
+        view = self._view = memoryview(self._mm)
+
+        self._sections = {}
+        for name, (offset, typecode, count) in header["sections"].items():
+            itemsize = array(typecode).itemsize
+            start = base + offset
+            self._sections[name] = view[start:start + count * itemsize].cast(typecode)
+
+        self._n = header["nodes"]
+        self._m = header["edges"]
+        self._node_columns = header["node_columns"]
+        self._edge_columns = header["edge_columns"]
+
+        self._ids = self._table("node_ids")
+        self._strings = self._table("strings")
+
+        self.nodes = _NodeView(self)
+
+    def _table(self, name):
+        return _StringTable(
+            self._sections[f"{name}.offsets"],
+            self._sections[f"{name}.blob"]
+        )
+
+    def nbytes(self) -> int:
+        return len(self._mm)
+
+    # -----------------------------------------------------
+    # Index helpers
+    # -----------------------------------------------------
+    def _index(self, node):
+        if not isinstance(node, str):
+            return None
+        i = bisect.bisect_left(self._ids, node)
+        if i < self._n and self._ids[i] == node:
+            return i
+        return None
+
+    def _value(self, kind, raw):
+        if kind == "int":
+            return raw
+        if raw < 0:
+            return None
+        value = self._strings[raw]
+        if kind == "list":
+            return value.split(LIST_SEP) if value else []
+        return value
+
+    def _node_attrs(self, idx):
+        return {
+            key: self._value(kind, self._sections[f"node.{key}"][idx])
+            for key, kind in self._node_columns.items()
+        }
+
+    def _edge_attrs(self, edge_idx):
+        return {
+            key: self._value(kind, self._sections[f"edge.{key}"][edge_idx])
+            for key, kind in self._edge_columns.items()
+        }
+
+    def _succ_range(self, idx):
+        offsets = self._sections["succ.offsets"]
+        return offsets[idx], offsets[idx + 1]
+
+    def _pred_range(self, idx):
+        offsets = self._sections["pred.offsets"]
+        return offsets[idx], offsets[idx + 1]
+
+    # -----------------------------------------------------
+    # networkx-compatible API
+    # -----------------------------------------------------
+    def __len__(self):
+        return self._n
+
+    def __iter__(self):
+        return (self._ids[i] for i in range(self._n))
+
+    def __contains__(self, node):
+        return self._index(node) is not None
+
+    def has_node(self, node):
+        return self._index(node) is not None
+
+    def number_of_nodes(self):
+        return self._n
+
+    def number_of_edges(self):
+        return self._m
+
+    def successors(self, node):
+        idx = self._index(node)
+        if idx is None:
+            raise nx.NetworkXError(f"The node {node} is not in the digraph.")
+        start, end = self._succ_range(idx)
+        targets = self._sections["succ.targets"]
+        return (self._ids[targets[e]] for e in range(start, end))
+
+    def predecessors(self, node):
+        idx = self._index(node)
+        if idx is None:
+            raise nx.NetworkXError(f"The node {node} is not in the digraph.")
+        start, end = self._pred_range(idx)
+        sources = self._sections["pred.sources"]
+        return (self._ids[sources[e]] for e in range(start, end))
+
+    neighbors = successors
+
+    def out_degree(self, node):
+        idx = self._index(node)
+        if idx is None:
+            raise nx.NetworkXError(f"The node {node} is not in the digraph.")
+        start, end = self._succ_range(idx)
+        return end - start
+
+    def in_degree(self, node):
+        idx = self._index(node)
+        if idx is None:
+            raise nx.NetworkXError(f"The node {node} is not in the digraph.")
+        start, end = self._pred_range(idx)
+        return end - start
+
+    def has_edge(self, u, v):
+        return self._edge_index(u, v) is not None
+
+    def _edge_index(self, u, v):
+        ui, vi = self._index(u), self._index(v)
+        if ui is None or vi is None:
+            return None
+        start, end = self._succ_range(ui)
+        targets = self._sections["succ.targets"]
+        e = bisect.bisect_left(targets, vi, start, end)
+        return e if e < end and targets[e] == vi else None
+
+    def get_edge_data(self, u, v, default=None):
+        e = self._edge_index(u, v)
+        return default if e is None else self._edge_attrs(e)
+
+    def edges(self, data=False):
+        targets = self._sections["succ.targets"]
+        offsets = self._sections["succ.offsets"]
+        for ui in range(self._n):
+            for e in range(offsets[ui], offsets[ui + 1]):
+                u, v = self._ids[ui], self._ids[targets[e]]
+                yield (u, v, self._edge_attrs(e)) if data else (u, v)
+
+    def descendants(self, node):
+        idx = self._index(node)
+        if idx is None:
+            raise nx.NetworkXError(f"The node {node} is not in the graph.")
+
+        offsets = self._sections["succ.offsets"]
+        targets = self._sections["succ.targets"]
+
+        seen = {idx}
+        queue = deque([idx])
+        while queue:
+            u = queue.popleft()
+            for e in range(offsets[u], offsets[u + 1]):
+                v = targets[e]
+                if v not in seen:
+                    seen.add(v)
+                    queue.append(v)
+
+        seen.discard(idx)
+        return {self._ids[i] for i in seen}
+
+    def to_networkx(self) -> nx.DiGraph:
+        G = nx.DiGraph()
+        G.add_nodes_from(
+            (self._ids[i], self._node_attrs(i)) for i in range(self._n)
+        )
+        G.add_edges_from(self.edges(data=True))
+        return G
+
+    def close(self):
+        # Views into the mapping must be released before it can close
+        for section in self._sections.values():
+            section.release()
+        self._sections.clear()
+        self._view.release()
+        self._mm.close()
+
+
+def load_compact_graph(path: Path) -> CompactGraph:
+    return CompactGraph(path)
+
+
+def descendants(graph, node):
+    """nx.descendants that also works on CompactGraph."""
+    if isinstance(graph, CompactGraph):
+        return graph.descendants(node)
+    return nx.descendants(graph, node)
@@ -0,0 +1,248 @@
+import os
+import mmap
+import fcntl
+import sqlite3
+import threading
+from array import array
+from pathlib import Path
+from typing import Dict, List
+
+from langchain_core.embeddings import Embeddings
+
+from .python_parser.parse_python_files import compute_chunk_hash
+
+
+# =========================================================
+# Shared embedding store
+#
+# Vectors live in one append-only float32 matrix (`vectors.f32`) that
+# is memory-mapped for reads; `index.sqlite` maps chunk hash → row.
+# One store per model, shared by every repository and re-ingest.
+# =========================================================
+EMBEDDING_CACHE_DIR = Path(os.getenv("EMBEDDING_CACHE_DIR", "cache/embeddings"))
+
+# The model only reads its first 256 word pieces; cutting long chunks
+# well past that point skips tokenizing the rest of a 2,000-line class
+# without changing what the model sees
+EMBED_MAX_CHARS = int(os.getenv("EMBED_MAX_CHARS", 4096))
+
+
+class EmbeddingStore:
+
+    def __init__(self, model_key: str, root: Path = EMBEDDING_CACHE_DIR):
+        self.dir = root / model_key.replace("/", "__")
+        self.vectors_path = self.dir / "vectors.f32"
+        self.index_path = self.dir / "index.sqlite"
+
+        self._lock = threading.Lock()
+        self._conn = None
+        self._dim = None
+        self._map = None
+        self._mapped_size = 0
+
+    # -----------------------------------------------------
+    # Storage handles (opened lazily so forked workers never
+    # inherit an open connection)
+    # -----------------------------------------------------
+    def _connect(self):
+        if self._conn is None:
+            self.dir.mkdir(parents=True, exist_ok=True)
+            self.vectors_path.touch(exist_ok=True)
+
+            self._conn = sqlite3.connect(
+                self.index_path,
+                check_same_thread=False,
+                timeout=30
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS vectors (hash TEXT PRIMARY KEY, row INTEGER)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)"
+            )
+
+            found = self._conn.execute(
+                "SELECT value FROM meta WHERE key = 'dim'"
+            ).fetchone()
+            self._dim = int(found[0]) if found else None
+
+        return self._conn
+
+    def _view(self, needed_bytes: int):
+        if self._map is None or self._mapped_size < needed_bytes:
+            if self._map is not None:
+                self._map.close()
+
+            with open(self.vectors_path, "rb") as f:
+                self._mapped_size = os.fstat(f.fileno()).st_size
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        return self._map
+
+    # -----------------------------------------------------
+    # Public API
+    # -----------------------------------------------------
+    def get_many(self, hashes: List[str]) -> Dict[str, List[float]]:
+        if not hashes:
+            return {}
+
+        with self._lock:
+            conn = self._connect()
+
+            if self._dim is None:
+                return {}
+
+            rows = {}
+            unique = list(set(hashes))
+
+            for i in range(0, len(unique), 500):
+                part = unique[i:i + 500]
+                marks = ",".join("?" * len(part))
+
+                rows.update(conn.execute(
+                    f"SELECT hash, row FROM vectors WHERE hash IN ({marks})",
+                    part
+                ).fetchall())
+
+            if not rows:
+                return {}
+
+            row_bytes = self._dim * 4
+            view = self._view((max(rows.values()) + 1) * row_bytes)
+
+            # Only whole rows inside the mapped file are trusted; the
+            # rest are treated as misses and embedded again
+            whole_rows = self._mapped_size // row_bytes
+
+            found = {}
+            for chunk_hash, row in rows.items():
+                if row >= whole_rows:
+                    continue
+
+                vec = array("f")
+                vec.frombytes(view[row * row_bytes:(row + 1) * row_bytes])
+                found[chunk_hash] = vec.tolist()
+
+            return found
+
+    def get_meta(self, key: str):
+        with self._lock:
+            found = self._connect().execute(
+                "SELECT value FROM meta WHERE key = ?", (key,)
+            ).fetchone()
+
+            return found[0] if found else None
+
+    def set_meta(self, key: str, value: str):
+        with self._lock:
+            conn = self._connect()
+            conn.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, value))
+            conn.commit()
+
+    def put_many(self, hashes: List[str], vectors: List[List[float]]):
+        if not hashes:
+            return
+
+        with self._lock:
+            conn = self._connect()
+
+            if self._dim is None:
+                self._dim = len(vectors[0])
+                conn.execute(
+                    "INSERT OR REPLACE INTO meta VALUES ('dim', ?)",
+                    (str(self._dim),)
+                )
+
+            row_bytes = self._dim * 4
+
+            with open(self.vectors_path, "ab") as f:
+                # Other processes may append to the same store; the
+                # index rows are written under the same lock, so an
+                # indexed row is always fully on disk
+                fcntl.flock(f, fcntl.LOCK_EX)
+                size = f.seek(0, os.SEEK_END)
+
+                # A writer that died mid-append leaves a partial row;
+                # drop it so every row after it keeps its offset
+                torn = size % row_bytes
+                if torn:
+                    print("Embedding store: dropping", torn, "bytes of a partial row")
+                    size -= torn
+                    f.truncate(size)
+
+                    # Rows at or past the cut will be reused
+                    conn.execute(
+                        "DELETE FROM vectors WHERE row >= ?",
+                        (size // row_bytes,)
+                    )
+
+                next_row = size // row_bytes
+
+                new_rows = []
+                for chunk_hash, vec in zip(hashes, vectors):
+                    f.write(array("f", vec).tobytes())
+                    new_rows.append((chunk_hash, next_row))
+                    next_row += 1
+
+                f.flush()
+
+                conn.executemany(
+                    "INSERT OR IGNORE INTO vectors VALUES (?, ?)",
+                    new_rows
+                )
+                conn.commit()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that only sends chunks it has never seen to the
+    underlying model. Document texts are chunk code, so their SHA-1 is
+    exactly the chunk `hash` computed by the parsers.
+
+    `batch_size` overrides the model's encode batch size for one call,
+    so callers can send short chunks in wide batches and long ones in
+    narrow batches.
+    """
+
+    def __init__(self, model: Embeddings, store: EmbeddingStore):
+        self.model = model
+        self.store = store
+        self._variants = {}
+
+    def _model_for(self, batch_size):
+        encode_kwargs = getattr(self.model, "encode_kwargs", None)
+
+        if batch_size is None or not isinstance(encode_kwargs, dict):
+            return self.model
+
+        variant = self._variants.get(batch_size)
+
+        if variant is None:
+            # Shallow copy: shares the loaded sentence-transformer
+            variant = self.model.model_copy(update={
+                "encode_kwargs": {**encode_kwargs, "batch_size": batch_size}
+            })
+            self._variants[batch_size] = variant
+
+        return variant
+
+    def embed_documents(self, texts: List[str], batch_size: int = None) -> List[List[float]]:
+        hashes = [compute_chunk_hash(t) for t in texts]
+        found = self.store.get_many(hashes)
+
+        missing = {}
+        for chunk_hash, text in zip(hashes, texts):
+            if chunk_hash not in found and chunk_hash not in missing:
+                missing[chunk_hash] = text
+
+        if missing:
+            vectors = self._model_for(batch_size).embed_documents(
+                [text[:EMBED_MAX_CHARS] for text in missing.values()]
+            )
+            self.store.put_many(list(missing.keys()), vectors)
+            found.update(zip(missing.keys(), vectors))
+
+        return [found[h] for h in hashes]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.model.embed_query(text)
@@ -0,0 +1,262 @@
+import queue
+import threading
+import time
+import uuid
+from collections import deque
+from typing import List
+
+from langchain_core.documents import Document
+
+from .embedding_cache import CachedEmbeddings
+from .embedding_workers import EMBEDDING_WORKERS, embed_shard, get_embedding_pool
+
+
+# =========================================================
+# Streaming embedding stage
+#
+# Parsed documents are pushed in as soon as each file is parsed; a
+# background thread embeds them batch by batch while parsing goes on.
+# The queue is bounded, so a slow embedder blocks the producer
+# instead of letting parsed chunks pile up in memory.
+#
+# Documents are bucketed by estimated token length before batching:
+# a batch only pads up to its longest sequence, so one 2,000-line
+# class no longer inflates the cost of 31 one-liners. Short buckets
+# use wide model batches, long ones narrow batches.
+# =========================================================
+EMBED_QUEUE_BATCHES = 8
+
+CHARS_PER_TOKEN = 4
+
+# (max estimated tokens, model batch size); the last bucket takes the
+# rest, which the embedding cache truncates (EMBED_MAX_CHARS)
+EMBED_BUCKETS = [
+    (64, 128),
+    (128, 64),
+    (None, 32),
+]
+
+# Model batches sent per vectorstore write
+EMBED_BATCHES_PER_FLUSH = 4
+
+# With worker processes: shards outstanding per worker, and documents
+# collected before one bulk vectorstore write
+EMBED_SHARDS_PER_WORKER = 2
+EMBED_MERGE_DOCS = 2000
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def bucket_for(text: str) -> int:
+    tokens = estimate_tokens(text)
+
+    for index, (max_tokens, _) in enumerate(EMBED_BUCKETS[:-1]):
+        if tokens <= max_tokens:
+            return index
+
+    return len(EMBED_BUCKETS) - 1
+
+
+class EmbeddingStage:
+
+    def __init__(self, vectorstore=None, chunk_store=None, workers=None):
+        """
+        vectorstore: Chroma collection to embed into, or None to skip
+                     embedding (collection already built)
+        chunk_store: ChunkStore receiving the same documents, or None
+        workers:     embedding processes; 0 or 1 embeds in this process
+                     (defaults to EMBEDDING_WORKERS)
+        """
+        self.vectorstore = vectorstore
+        self.chunk_store = chunk_store
+        self.workers = EMBEDDING_WORKERS if workers is None else workers
+
+        self._queue = queue.Queue(maxsize=EMBED_QUEUE_BATCHES)
+        self._buckets: List[List[Document]] = [[] for _ in EMBED_BUCKETS]
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._error = None
+
+        self.documents = 0
+        self.embedded = 0
+        self.busy_seconds = 0.0
+        self.embed_seconds = 0.0
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def add(self, docs: List[Document]):
+        for doc in docs:
+            index = bucket_for(doc.page_content)
+            bucket = self._buckets[index]
+            bucket.append(doc)
+
+            batch_size = EMBED_BUCKETS[index][1]
+
+            if len(bucket) >= batch_size * EMBED_BATCHES_PER_FLUSH:
+                self._queue.put((batch_size, bucket))
+                self._buckets[index] = []
+
+    def finish(self):
+        """Flush remaining documents and wait for the consumer to drain."""
+        for index, bucket in enumerate(self._buckets):
+            if bucket:
+                self._queue.put((EMBED_BUCKETS[index][1], bucket))
+                self._buckets[index] = []
+
+        self._queue.put(None)
+        self._thread.join()
+
+        if self._error is not None:
+            raise self._error
+
+        if self.vectorstore is not None:
+            self.vectorstore.persist()
+
+        if self.embedded:
+            print(f"Embedded {self.embedded} chunks in {self.embed_seconds:.2f}s "
+                  f"({self.chunks_per_second():.1f} chunks/sec)")
+
+    def chunks_per_second(self) -> float:
+        if not self.embed_seconds:
+            return 0.0
+        return self.embedded / self.embed_seconds
+
+    def _upsert(self, docs: List[Document], vectors):
+        # Same write Chroma.add_documents makes, with our own vectors
+        self.vectorstore._collection.upsert(
+            ids=[str(uuid.uuid4()) for _ in docs],
+            embeddings=vectors,
+            documents=[doc.page_content for doc in docs],
+            metadatas=[doc.metadata for doc in docs],
+        )
+
+    def _embed(self, batch_size: int, docs: List[Document]):
+        texts = [doc.page_content for doc in docs]
+        embedding = self.vectorstore.embeddings
+
+        if isinstance(embedding, CachedEmbeddings):
+            vectors = embedding.embed_documents(texts, batch_size=batch_size)
+        else:
+            vectors = embedding.embed_documents(texts)
+
+        self._upsert(docs, vectors)
+
+    def _run(self):
+        if self.vectorstore is not None and self.workers > 1:
+            return self._run_sharded()
+
+        while True:
+            item = self._queue.get()
+
+            if item is None:
+                return
+
+            # After a failure keep draining so the producer never blocks
+            if self._error is not None:
+                continue
+
+            batch_size, batch = item
+            start = time.time()
+
+            try:
+                if self.vectorstore is not None:
+                    self._embed(batch_size, batch)
+                    self.embedded += len(batch)
+                    self.embed_seconds += time.time() - start
+
+                if self.chunk_store is not None:
+                    self.chunk_store.put_documents(batch)
+
+            except Exception as e:
+                print("Embedding batch failed:", e)
+                self._error = e
+                continue
+
+            self.documents += len(batch)
+            self.busy_seconds += time.time() - start
+
+    def _run_sharded(self):
+        """
+        Consumer loop with worker processes: each queued batch becomes
+        a shard, and finished shards are written to the collection in
+        bulk (EMBED_MERGE_DOCS at a time).
+        """
+        pool = get_embedding_pool(self.workers)
+
+        in_flight = deque()       # (future, docs)
+        merged = []               # (docs, vectors) awaiting one write
+        started = None
+
+        def write_merged():
+            docs = [doc for part, _ in merged for doc in part]
+            vectors = [vec for _, part in merged for vec in part]
+            merged.clear()
+
+            if docs:
+                self._upsert(docs, vectors)
+                self.embedded += len(docs)
+
+        def collect(limit):
+            pending = sum(len(docs) for docs, _ in merged)
+
+            while len(in_flight) > limit:
+                future, docs = in_flight.popleft()
+                merged.append((docs, future.result()))
+                pending += len(docs)
+
+                if pending >= EMBED_MERGE_DOCS:
+                    write_merged()
+                    pending = 0
+
+        while True:
+            item = self._queue.get()
+
+            if item is None:
+                break
+
+            if self._error is not None:
+                continue
+
+            batch_size, batch = item
+            start = time.time()
+            started = started or start
+
+            try:
+                if self.chunk_store is not None:
+                    self.chunk_store.put_documents(batch)
+
+                in_flight.append((
+                    pool.submit(
+                        embed_shard,
+                        [doc.page_content for doc in batch],
+                        batch_size
+                    ),
+                    batch
+                ))
+
+                collect(self.workers * EMBED_SHARDS_PER_WORKER)
+
+            except Exception as e:
+                print("Embedding batch failed:", e)
+                self._error = e
+                continue
+
+            self.documents += len(batch)
+            self.busy_seconds += time.time() - start
+
+        if self._error is None:
+            try:
+                collect(0)
+                write_merged()
+            except Exception as e:
+                print("Embedding batch failed:", e)
+                self._error = e
+
+        for future, _ in in_flight:
+            future.cancel()
+
+        if started is not None:
+            self.embed_seconds = time.time() - started
@@ -0,0 +1,100 @@
+import os
+import atexit
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+
+# =========================================================
+# Embedding worker processes
+#
+# On CPU-only hosts one process cannot keep every core busy while
+# encoding. With EMBEDDING_WORKERS > 1 the embedding stage shards its
+# batches across that many processes, each holding its own model and
+# limited to cores / workers torch threads so they do not fight over
+# the same cores. Workers write through the shared embedding store,
+# so vectors computed by any of them are reused later.
+#
+# 0 or 1 keeps embedding in the ingesting process.
+# =========================================================
+EMBEDDING_WORKERS = int(os.getenv("EMBEDDING_WORKERS", 0))
+
+
+def _available_cores() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def threads_per_worker(workers: int) -> int:
+    return max(1, _available_cores() // workers)
+
+
+def _init_worker(threads: int):
+    # Must be set before torch / tokenizers are imported
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    os.environ["MKL_NUM_THREADS"] = str(threads)
+    os.environ["TOKENIZERS_PARALLELISM"] = "false"
+
+    try:
+        import torch
+        torch.set_num_threads(threads)
+        torch.set_num_interop_threads(1)
+    except (ImportError, RuntimeError):
+        pass
+
+    from retrieval.resources import get_embedding_model
+
+    # Load the model now rather than on the first shard
+    get_embedding_model()
+
+
+def embed_shard(texts, batch_size):
+    """Runs in a worker: vectors for `texts`, through the shared store."""
+    from retrieval.resources import get_embedding_model
+
+    return get_embedding_model().embed_documents(texts, batch_size=batch_size)
+
+
+# ---------------------------------------------------------
+# Warm pool
+# ---------------------------------------------------------
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def get_embedding_pool(workers: int) -> ProcessPoolExecutor:
+    global _pool, _pool_workers
+
+    with _pool_lock:
+        broken = _pool is not None and getattr(_pool, "_broken", False)
+
+        if _pool is None or broken or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=not broken, cancel_futures=True)
+
+            # Spawn, not fork: a forked copy of a process that already
+            # started torch's thread pools can deadlock
+            _pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(threads_per_worker(workers),)
+            )
+            _pool_workers = workers
+
+        return _pool
+
+
+def shutdown_embedding_pool():
+    global _pool
+
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool = None
+
+
+atexit.register(shutdown_embedding_pool)
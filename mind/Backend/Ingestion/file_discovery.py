@@ -0,0 +1,371 @@
+import os
+import re
+import subprocess
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+
+# =========================================================
+# File discovery
+#
+# Produces the files an ingestion should look at, as a generator so
+# callers can start filtering before the walk has finished. Ingestion
+# does not stream it into the parse scheduler: the full list is
+# collected and sorted first (see run_ingestion).
+#
+# - in a git checkout the file list comes from `git ls-files`, which
+#   already applies .gitignore, .git/info/exclude and the global
+#   excludes file
+# - otherwise directories are walked with os.scandir on a thread pool
+#   (one directory per task), applying .gitignore files on the way
+# - directories and files matching the IGNORED_* rules are skipped,
+#   as are files above MAX_FILE_BYTES and files that look binary
+#   (a NUL byte in the first BINARY_SNIFF_BYTES)
+# =========================================================
+IGNORED_DIRS = {
+    ".git", "venv", "__pycache__", "node_modules",
+    "dist", "build", ".cache",
+    "public", "assets", "static", ".next", "coverage", "out"
+}
+
+IGNORED_EXTENSIONS = {
+    ".png", ".jpg", ".jpeg", ".gif", ".svg",
+    ".mp3", ".mp4", ".wav",
+    ".pdf", ".zip", ".exe", ".bin",
+    ".env", ".lock", ".log", ".csv"
+}
+
+IGNORED_FILES = {
+    ".gitignore", "__init__.py","package-lock.json", "package.json"
+}
+
+MAX_FILE_BYTES = int(os.getenv("DISCOVERY_MAX_FILE_BYTES", 2 * 1024 * 1024))
+BINARY_SNIFF_BYTES = 8192
+
+DISCOVERY_WORKERS = int(os.getenv("DISCOVERY_WORKERS", 8))
+
+# Files checked (stat + sniff) per thread pool task
+CHECK_BATCH_SIZE = 512
+
+
+# ---------------------------------------------------------
+# Per-path rules
+# ---------------------------------------------------------
+def is_ignored_dir(name: str) -> bool:
+    # hidden directories are skipped along with the named ones
+    return name in IGNORED_DIRS or name.startswith(".")
+
+
+def is_ignored_name(name: str, extensions=None) -> bool:
+    suffix = os.path.splitext(name)[1].lower()
+
+    if name in IGNORED_FILES or suffix in IGNORED_EXTENSIONS:
+        return True
+
+    return extensions is not None and suffix not in extensions
+
+
+def looks_binary(path) -> bool:
+    try:
+        with open(path, "rb") as f:
+            return b"\0" in f.read(BINARY_SNIFF_BYTES)
+    except OSError:
+        return True
+
+
+def is_readable_source(path, size=None) -> bool:
+    """Size and binary checks for a single file."""
+    if size is None:
+        try:
+            size = os.stat(path).st_size
+        except OSError:
+            return False
+
+    return size <= MAX_FILE_BYTES and not looks_binary(path)
+
+
+# ---------------------------------------------------------
+# .gitignore patterns (used when git is not available)
+# ---------------------------------------------------------
+def _translate_pattern(pattern: str) -> str:
+    out = []
+    i = 0
+
+    while i < len(pattern):
+        c = pattern[i]
+
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+            continue
+
+        if pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+            continue
+
+        if c == "*":
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "[":
+            end = pattern.find("]", i + 1)
+            if end == -1:
+                out.append(re.escape(c))
+            else:
+                body = pattern[i + 1:end]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                out.append(f"[{body}]")
+                i = end
+        elif c == "\\" and i + 1 < len(pattern):
+            i += 1
+            out.append(re.escape(pattern[i]))
+        else:
+            out.append(re.escape(c))
+
+        i += 1
+
+    return "".join(out)
+
+
+def parse_gitignore(path: Path, base: str):
+    """
+    Rules from one .gitignore as (base, regex, negate, dir_only,
+    anchored), `base` being its directory relative to the walk root
+    ("" for the root itself).
+    """
+    try:
+        lines = path.read_text(encoding="utf-8", errors="replace").splitlines()
+    except OSError:
+        return []
+
+    rules = []
+
+    for line in lines:
+        line = line.rstrip()
+        if not line or line.startswith("#"):
+            continue
+
+        negate = line.startswith("!")
+        if negate:
+            line = line[1:]
+
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+
+        # A slash anywhere but the end anchors the pattern to `base`
+        anchored = "/" in line
+        line = line.lstrip("/")
+
+        if not line:
+            continue
+
+        regex = re.compile(_translate_pattern(line) + r"\Z")
+        rules.append((base, regex, negate, dir_only, anchored))
+
+    return rules
+
+
+def is_gitignored(rules, relative_path: str, is_dir: bool) -> bool:
+    """Last matching rule wins, as in git."""
+    name = relative_path.rsplit("/", 1)[-1]
+    ignored = False
+
+    for base, regex, negate, dir_only, anchored in rules:
+        if dir_only and not is_dir:
+            continue
+
+        if base:
+            if not relative_path.startswith(base + "/"):
+                continue
+            below = relative_path[len(base) + 1:]
+        else:
+            below = relative_path
+
+        # Unanchored patterns match the name at any depth
+        if regex.match(below if anchored else name):
+            ignored = not negate
+
+    return ignored
+
+
+# ---------------------------------------------------------
+# Listing
+# ---------------------------------------------------------
+def _git_ls_files(root: Path):
+    """
+    Relative paths of tracked and untracked-but-not-ignored files, or
+    None when `root` is not a git checkout (or git is unavailable).
+    """
+    if not (root / ".git").exists():
+        return None
+
+    try:
+        out = subprocess.run(
+            [
+                "git", "-C", str(root), "ls-files", "-z",
+                "--cached", "--others", "--exclude-standard"
+            ],
+            capture_output=True,
+            check=True
+        ).stdout
+    except (OSError, subprocess.CalledProcessError) as e:
+        print("git ls-files failed, walking the tree instead:", e)
+        return None
+
+    return [p for p in out.decode("utf-8", errors="surrogateescape").split("\0") if p]
+
+
+def _scan_dir(root: str, relative_dir: str, rules, extensions):
+    """
+    One os.scandir pass: returns (candidate files as (path, size),
+    subdirectories as (relative_dir, rules)).
+    """
+    directory = os.path.join(root, relative_dir) if relative_dir else root
+
+    gitignore = os.path.join(directory, ".gitignore")
+    if os.path.isfile(gitignore):
+        rules = rules + parse_gitignore(Path(gitignore), relative_dir)
+
+    files, subdirs = [], []
+
+    try:
+        entries = list(os.scandir(directory))
+    except OSError as e:
+        print("Cannot list directory:", directory, e)
+        return files, subdirs
+
+    for entry in entries:
+        relative = f"{relative_dir}/{entry.name}" if relative_dir else entry.name
+
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                if not is_ignored_dir(entry.name) and not is_gitignored(rules, relative, True):
+                    subdirs.append((relative, rules))
+                continue
+
+            if not entry.is_file():
+                continue
+
+            if is_ignored_name(entry.name, extensions) or is_gitignored(rules, relative, False):
+                continue
+
+            files.append((entry.path, entry.stat().st_size))
+
+        except OSError:
+            continue
+
+    return files, subdirs
+
+
+def _walk(pool, root: Path, extensions):
+    """Breadth-first scandir walk, one directory per pool task."""
+    root = str(root)
+    in_flight = {pool.submit(_scan_dir, root, "", [], extensions)}
+
+    while in_flight:
+        done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+
+        for future in done:
+            files, subdirs = future.result()
+
+            for relative_dir, rules in subdirs:
+                in_flight.add(pool.submit(_scan_dir, root, relative_dir, rules, extensions))
+
+            yield files
+
+
+def _from_git(paths, root: Path, extensions):
+    """Apply the directory and name rules to `git ls-files` output."""
+    dir_ok = {"": True}
+    batch = []
+
+    for relative in paths:
+        parent, _, name = relative.rpartition("/")
+
+        ok = dir_ok.get(parent)
+        if ok is None:
+            ok = not any(is_ignored_dir(part) for part in parent.split("/"))
+            dir_ok[parent] = ok
+
+        if not ok or is_ignored_name(name, extensions):
+            continue
+
+        batch.append(os.path.join(root, relative))
+
+        if len(batch) >= CHECK_BATCH_SIZE:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
+
+
+def _check_files(candidates):
+    """Stat + sniff; `candidates` are paths or (path, size) pairs."""
+    kept = []
+
+    for candidate in candidates:
+        path, size = candidate if isinstance(candidate, tuple) else (candidate, None)
+
+        if is_readable_source(path, size):
+            kept.append(Path(path))
+
+    return kept
+
+
+def iter_source_files(root: Path, extensions=None, workers: int = DISCOVERY_WORKERS):
+    """
+    Yield the files under `root` worth ingesting. `extensions` (e.g.
+    {".py", ".java"}) limits the result before any file is opened.
+
+    Order is not stable: batches are yielded as the pool finishes them.
+    """
+    root = Path(root)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        paths = _git_ls_files(root)
+
+        if paths is not None:
+            batches = _from_git(paths, root, extensions)
+        else:
+            batches = _walk(pool, root, extensions)
+
+        checks = set()
+
+        for batch in batches:
+            checks.add(pool.submit(_check_files, batch))
+
+            # Hand back whatever is finished without blocking the listing
+            done = {f for f in checks if f.done()}
+            checks -= done
+            for future in done:
+                yield from future.result()
+
+        for future in checks:
+            yield from future.result()
+
+
+def clean_files(path: Path, extensions=None) -> list:
+    return list(iter_source_files(path, extensions))
+
+
+def is_clean_file(repo_root: Path, relative_path: str) -> bool:
+    """
+    Apply the same rules as `iter_source_files` to a single path
+    relative to the repository root (.gitignore aside: incremental
+    updates only see files git reports as changed).
+    """
+    parts = Path(relative_path).parts
+
+    if any(is_ignored_dir(part) for part in parts[:-1]):
+        return False
+
+    path = repo_root / relative_path
+
+    return (
+        path.is_file()
+        and not is_ignored_name(path.name)
+        and is_readable_source(path)
+    )
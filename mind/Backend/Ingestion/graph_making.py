@@ -1,103 +1,496 @@
-import networkx as nx
 import pickle
+from array import array
 from pathlib import Path
 
+from .compact_graph import CompactGraph, write_compact_graph, load_compact_graph
+from .import_scope import ImportIndex
+from .reach import add_node_stats
 
-def create_graph(all_chunks, all_relations, repo_hash):
 
-    G = nx.DiGraph()
+def chunk_id(chunk):
+    """
+    Use chunk hash as stable node ID.
+    Falls back to file::name if hash not present.
+    """
+    return chunk.hash or f"{chunk.file_path}::{chunk.name}"
+
+
+def build_resolver(all_chunks, all_relations=()):
+    """
+    Returns resolve(rel) → (src_node, dst_node) or None.
+
+    The source is the chunk the relation was found in (src_hash), else
+    the name in its own file. A target name is looked up in the
+    caller's scope before anywhere else:
 
-    def chunk_id(chunk):
-        """
-        Use chunk hash as stable node ID.
-        Falls back to file::name if hash not present.
-        """
-        return chunk.get("hash") or f"{chunk['file_path']}::{chunk['name']}"
+    1️⃣ the caller's class, then its base classes
+    2️⃣ the caller's file
+    3️⃣ files the caller's file imports
+    4️⃣ first definition anywhere
+
+    Relations without a src_file fall back to name-only resolution.
+    """
 
     # Map (file_path, name) → node
     file_name_to_node = {}
 
-    # Map name → nodes
+    # Map name → [(file_path, start_line, node)]
     name_to_nodes = {}
 
+    # Map (file_path, name) → [(start_line, node)]
+    file_name_to_defs = {}
+
     # Map hash → node
     hash_to_node = {}
 
+    # Caller spans: (file_path, hash) / (file_path, name) → (start, end)
+    span_by_hash = {}
+    span_by_name = {}
+
+    # Classes: file → [(start, end, name)], name → [(file, start, end)]
+    classes_in_file = {}
+    classes_by_name = {}
+
     for chunk in all_chunks:
 
         cid = chunk_id(chunk)
+        file_path = str(chunk.file_path)
+        span = (chunk.start_line, chunk.end_line)
 
-        hash_to_node[chunk.get("hash")] = cid
+        hash_to_node[chunk.hash] = cid
 
-        key = (str(chunk["file_path"]), chunk["name"])
+        key = (file_path, chunk.name)
         file_name_to_node[key] = cid
 
-        name_to_nodes.setdefault(chunk["name"], []).append(cid)
+        name_to_nodes.setdefault(chunk.name, []).append(
+            (file_path, chunk.start_line, cid)
+        )
+        file_name_to_defs.setdefault(key, []).append((chunk.start_line, cid))
+
+        span_by_hash[(file_path, chunk.hash)] = span
+        span_by_name[key] = span
+
+        if chunk.type == "class":
+            classes_in_file.setdefault(file_path, []).append((*span, chunk.name))
+            classes_by_name.setdefault(chunk.name, []).append((file_path, *span))
+
+    # (file_path, class) → base class names
+    bases = {}
+    import_relations = []
 
-    def resolve_node(name, file_path=None, chunk_hash=None):
-        """
-        Resolve nodes in priority order:
-        1️⃣ hash
-        2️⃣ file + name
-        3️⃣ name fallback
-        """
+    for rel in all_relations:
+        if rel.type == "inherits" and rel.src_file:
+            bases.setdefault((rel.src_file, rel.src), []).append(rel.dst)
+        elif rel.type == "import":
+            import_relations.append(rel)
+
+    imports = ImportIndex({file_path for file_path, _ in file_name_to_node}, import_relations)
 
-        if chunk_hash:
-            node = hash_to_node.get(chunk_hash)
+    def resolve_source(rel):
+        if rel.src_hash:
+            node = hash_to_node.get(rel.src_hash)
             if node:
                 return node
 
-        if file_path:
-            node = file_name_to_node.get((file_path, name))
-            if node:
+        if rel.src_file:
+            return file_name_to_node.get((rel.src_file, rel.src))
+
+        nodes = name_to_nodes.get(rel.src)
+        return nodes[0][2] if nodes else None
+
+    def pick_class(name, file_path):
+        """Class chunk `name` as seen from `file_path`."""
+        found = classes_by_name.get(name)
+        if not found:
+            return None
+
+        for cls in found:
+            if cls[0] == file_path:
+                return cls
+
+        imported = imports.imported_files(file_path)
+        for cls in found:
+            if cls[0] in imported:
+                return cls
+
+        return found[0]
+
+    # (file_path, src_hash, src) → class scopes of that caller
+    scope_cache = {}
+
+    def class_scopes(rel):
+        """[(file, start, end)] of the caller's class, then its bases."""
+        file_path = rel.src_file
+        key = (file_path, rel.src_hash, rel.src)
+
+        scopes = scope_cache.get(key)
+        if scopes is not None:
+            return scopes
+
+        scopes = scope_cache[key] = []
+
+        span = span_by_hash.get((file_path, rel.src_hash)) or span_by_name.get((file_path, rel.src))
+        if not span:
+            return scopes
+
+        enclosing = [
+            cls for cls in classes_in_file.get(file_path, ())
+            if cls[0] <= span[0] and span[1] <= cls[1]
+        ]
+        if not enclosing:
+            return scopes
+
+        # Innermost class around the caller
+        start, end, name = max(enclosing, key=lambda cls: cls[0])
+
+        queue = [(file_path, start, end, name)]
+        seen = set()
+
+        while queue:
+            cls_file, start, end, name = queue.pop(0)
+
+            if (cls_file, name) in seen:
+                continue
+            seen.add((cls_file, name))
+
+            scopes.append((cls_file, start, end))
+
+            for base in bases.get((cls_file, name), ()):
+                found = pick_class(base, cls_file)
+                if found:
+                    queue.append((*found, base))
+
+        return scopes
+
+    def resolve_target(rel):
+        candidates = name_to_nodes.get(rel.dst)
+
+        if not candidates:
+            return None
+
+        if len(candidates) == 1 or not rel.src_file:
+            return candidates[0][2]
+
+        for cls_file, start, end in class_scopes(rel):
+            for line, node in file_name_to_defs.get((cls_file, rel.dst), ()):
+                if start <= line <= end:
+                    return node
+
+        node = file_name_to_node.get((rel.src_file, rel.dst))
+        if node:
+            return node
+
+        imported = imports.imported_files(rel.src_file)
+        for file_path, _, node in candidates:
+            if file_path in imported:
                 return node
 
-        nodes = name_to_nodes.get(name)
-        return nodes[0] if nodes else None
+        return candidates[0][2]
+
+    def resolve(rel):
+        src = resolve_source(rel)
+        if not src:
+            return None
+
+        dst = resolve_target(rel)
+        if not dst:
+            return None
+
+        return src, dst
+
+    return resolve
+
+
+def chunk_attrs(chunk):
+    return {
+        "type": chunk.type,
+        "file": str(chunk.file_path),
+        "language": chunk.language or "unknown",
+        "params": chunk.params or [],
+        "decorators": chunk.decorators or [],
+        "hash": chunk.hash,  # store hash in metadata
+    }
+
+
+def relation_attrs(rel, count=1):
+    return {
+        "type": rel.type,
+        "language": rel.language or "unknown",
+        "confidence": rel.confidence or "unknown",
+        "route": rel.route,
+        "http_method": rel.http_method,
+        "backend_method": rel.backend_method,
+        "api_type": rel.api_type,
+        # Relations resolving to this edge
+        "count": count,
+    }
+
+
+def add_chunk_node(G, chunk):
+
+    G.add_node(chunk_id(chunk), **chunk_attrs(chunk))
+
+
+def add_relation_edge(G, src, dst, rel):
+    """Add an edge, or count one more relation behind an existing one."""
+
+    data = G.get_edge_data(src, dst)
+    count = data.get("count", 1) + 1 if data is not None else 1
+
+    G.add_edge(src, dst, **relation_attrs(rel, count))
+
+
+def remove_relation_edge(G, src, dst):
+    """Undo add_relation_edge: the edge goes once no relation is left."""
+
+    data = G.get_edge_data(src, dst)
+    if data is None:
+        return
+
+    # Graphs written before edges were counted hold 1 per edge
+    count = data.get("count", 1) - 1
+
+    if count > 0:
+        data["count"] = count
+    else:
+        G.remove_edge(src, dst)
+
+
+def build_edge_arrays(all_chunks, all_relations):
+    """
+    Resolve every relation to integer node indices in one pass.
+
+    Returns (node_ids, node_attrs, src, dst, edge_attrs). Relations
+    resolving to the same (src, dst) become one edge whose `count` is
+    the number of relations behind it; its other attributes come from
+    the last of them, as repeated add_edge calls left them.
+    """
+
+    node_ids = []
+    node_attrs = []
+    index = {}
 
-    # Add nodes
     for chunk in all_chunks:
+        cid = chunk_id(chunk)
+        i = index.get(cid)
 
-        node_id = chunk_id(chunk)
+        if i is None:
+            index[cid] = len(node_ids)
+            node_ids.append(cid)
+            node_attrs.append(chunk_attrs(chunk))
+        else:
+            node_attrs[i] = chunk_attrs(chunk)
 
-        G.add_node(
-            node_id,
-            type=chunk["type"],
-            file=str(chunk["file_path"]),
-            language=chunk.get("language", "unknown"),
-            params=chunk.get("params", []),
-            decorators=chunk.get("decorators", []),
-            hash=chunk.get("hash")  # store hash in metadata
-        )
+    resolve = build_resolver(all_chunks, all_relations)
+
+    edge_of = {}
+    src = array("I")
+    dst = array("I")
+    counts = []
+    last = []
 
-    # Add edges
     for rel in all_relations:
 
-        src = resolve_node(rel["from"])
-        dst = resolve_node(rel["to"])
+        edge = resolve(rel)
 
-        if not src or not dst:
+        if not edge:
             continue
 
-        G.add_edge(
-            src,
-            dst,
-            type=rel["type"],
-            language=rel.get("language", "unknown"),
-            confidence=rel.get("confidence", "unknown"),
-            route=rel.get("route"),
-            http_method=rel.get("http_method"),
-            backend_method=rel.get("backend_method"),
-            api_type=rel.get("api_type"),
-        )
+        key = (index[edge[0]], index[edge[1]])
+        e = edge_of.get(key)
+
+        if e is None:
+            edge_of[key] = len(last)
+            src.append(key[0])
+            dst.append(key[1])
+            counts.append(1)
+            last.append(rel)
+        else:
+            counts[e] += 1
+            last[e] = rel
+
+    edge_attrs = [relation_attrs(rel, count) for rel, count in zip(last, counts)]
+
+    return node_ids, node_attrs, src, dst, edge_attrs
+
+
+def graph_path_for(repo_hash):
+    return Path("graphs") / f"{repo_hash}.csr"
+
+
+def legacy_graph_path_for(repo_hash):
+    return Path("graphs") / f"{repo_hash}.pkl"
+
+
+def graph_exists(repo_hash):
+    return graph_path_for(repo_hash).exists() or legacy_graph_path_for(repo_hash).exists()
+
+
+def write_graph(repo_hash, node_ids, node_attrs, src, dst, edge_attrs):
 
     # create graphs directory
     graph_dir = Path("graphs")
     graph_dir.mkdir(exist_ok=True)
 
-    graph_path = graph_dir / f"{repo_hash}.pkl"
+    # Ranking reads these instead of traversing per query
+    add_node_stats(node_ids, node_attrs, src, dst)
+
+    write_compact_graph(
+        graph_path_for(repo_hash),
+        node_ids,
+        node_attrs,
+        list(zip(src, dst, edge_attrs))
+    )
+
+    # The compact file supersedes pickles written by older versions
+    legacy_graph_path_for(repo_hash).unlink(missing_ok=True)
+
+
+def save_graph(G, repo_hash):
+
+    node_ids = list(G.nodes)
+    index = {node: i for i, node in enumerate(node_ids)}
+
+    src = array("I")
+    dst = array("I")
+    edge_attrs = []
+
+    for u, v, attrs in G.edges(data=True):
+        src.append(index[u])
+        dst.append(index[v])
+        edge_attrs.append(attrs)
+
+    write_graph(
+        repo_hash,
+        node_ids,
+        [G.nodes[node] for node in node_ids],
+        src,
+        dst,
+        edge_attrs
+    )
+
+
+def open_graph(repo_hash):
+    """
+    Read-only graph for traversal: a memory-mapped CompactGraph, or
+    the unpickled DiGraph for repositories ingested before the compact
+    format existed.
+    """
+
+    graph_path = graph_path_for(repo_hash)
+
+    if graph_path.exists():
+        return load_compact_graph(graph_path)
+
+    with open(legacy_graph_path_for(repo_hash), "rb") as f:
+        return pickle.load(f)
+
+
+def load_graph(repo_hash):
+    """Mutable networkx copy of the stored graph, used for patching."""
+
+    graph = open_graph(repo_hash)
+
+    if isinstance(graph, CompactGraph):
+        G = graph.to_networkx()
+        graph.close()
+        return G
+
+    return graph
+
+
+def create_graph(all_chunks, all_relations, repo_hash):
+    """
+    Build the graph straight from resolved edge arrays into its
+    compact file; no networkx graph is materialized.
+    """
+
+    write_graph(repo_hash, *build_edge_arrays(all_chunks, all_relations))
+
+
+def patch_graph(
+    G,
+    old_chunks,
+    old_relations,
+    new_chunks,
+    new_relations,
+    changed_files,
+    repo_hash
+):
+    """
+    Update an existing graph in place after some files changed.
+
+    Edges are resolved by name within the caller's scope, so a relation
+    is affected when either of its endpoint names is defined in a changed
+    file (before or after the change), when it was found in a changed
+    file (its imports may differ), or when the relation itself only
+    exists on one side (bridge edges). A change to any inheritance
+    relation can move class scopes anywhere, so it makes every relation
+    affected. Affected relations are taken off their edges using the old
+    resolution and re-added using the new one (an edge goes once its
+    count drops to zero); everything else is left untouched.
+    """
+
+    changed_files = set(changed_files)
+
+    old_changed = [c for c in old_chunks if str(c.file_path) in changed_files]
+    new_changed = [c for c in new_chunks if str(c.file_path) in changed_files]
+
+    affected_names = {c.name for c in old_changed}
+    affected_names.update(c.name for c in new_changed)
+
+    def pair(rel):
+        return rel.src, rel.dst
+
+    old_pairs = {pair(r) for r in old_relations}
+    new_pairs = {pair(r) for r in new_relations}
+    affected_pairs = old_pairs ^ new_pairs
+
+    def inheritance(relations):
+        return {(r.src_file, r.src, r.dst) for r in relations if r.type == "inherits"}
+
+    hierarchy_changed = inheritance(old_relations) != inheritance(new_relations)
+
+    def is_affected(rel):
+        return (
+            hierarchy_changed
+            or rel.src in affected_names
+            or rel.dst in affected_names
+            or rel.src_file in changed_files
+            or pair(rel) in affected_pairs
+        )
+
+    # Drop edges produced by affected relations under the old resolution
+    old_resolve = build_resolver(old_chunks, old_relations)
+
+    for rel in old_relations:
+        if not is_affected(rel):
+            continue
+
+        edge = old_resolve(rel)
+        if edge:
+            remove_relation_edge(G, *edge)
+
+    # Drop nodes that no longer exist anywhere in the repository
+    remaining = {chunk_id(c) for c in new_chunks}
+    G.remove_nodes_from(
+        [chunk_id(c) for c in old_changed if chunk_id(c) not in remaining]
+    )
+
+    for chunk in new_changed:
+        add_chunk_node(G, chunk)
+
+    # Re-add affected edges under the new resolution
+    new_resolve = build_resolver(new_chunks, new_relations)
+
+    for rel in new_relations:
+        if not is_affected(rel):
+            continue
+
+        edge = new_resolve(rel)
+        if edge:
+            add_relation_edge(G, edge[0], edge[1], rel)
 
-    with open(graph_path, "wb") as f:
-        pickle.dump(G, f)
+    save_graph(G, repo_hash)
 
-    return G
\ No newline at end of file
+    return G
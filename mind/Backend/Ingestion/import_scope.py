@@ -0,0 +1,114 @@
+import re
+from pathlib import PurePath
+
+
+# =========================================================
+# Import scope
+#
+# Maps the import statements the parsers record ("import" relations)
+# to repository files, so edge resolution can prefer definitions from
+# files the caller actually imports. Matching is by path suffix:
+# `from services.user import find` matches .../services/user.py,
+# `import com.acme.UserRepo;` matches .../com/acme/UserRepo.java and
+# `import { find } from "../services/user"` matches
+# .../services/user.js, wherever the repository root happens to be.
+# =========================================================
+PACKAGE_FILES = {"__init__", "index"}
+
+JS_SPECIFIER = re.compile(r"""(?:from\s+|import\s+|require\s*\(\s*)['"]([^'"]+)['"]""")
+
+JS_EXTENSIONS = (".js", ".jsx", ".ts", ".tsx", ".mjs", ".cjs")
+
+
+def module_parts(file_path) -> tuple:
+    """services/user.py → ("services", "user"); package files drop their stem."""
+    parts = PurePath(str(file_path)).with_suffix("").parts
+
+    if parts and parts[-1] in PACKAGE_FILES:
+        parts = parts[:-1]
+
+    return parts
+
+
+def import_targets(spec: str, language: str):
+    """
+    Module paths an import may refer to, as (parts, is_package):
+    is_package means every file directly inside that directory.
+    """
+    if language == "javascript":
+        match = JS_SPECIFIER.search(spec)
+        if not match:
+            return []
+
+        path = match.group(1)
+        for ext in JS_EXTENSIONS:
+            if path.endswith(ext):
+                path = path[:-len(ext)]
+                break
+
+        parts = tuple(p for p in path.split("/") if p not in ("", ".", ".."))
+        return [(parts, False)] if parts else []
+
+    # Python and Java: dotted names
+    spec = spec.strip()
+    if spec.startswith("static "):
+        spec = spec[len("static "):]
+
+    parts = tuple(p for p in spec.strip(".").split(".") if p)
+
+    if not parts:
+        return []
+
+    if parts[-1] == "*":
+        return [(parts[:-1], True)]
+
+    # `from a.b import c` may name a module (a/b/c.py) or a member of
+    # a/b.py; `import a.b.C;` in Java names the file a/b/C.java
+    return [(parts, False), (parts[:-1], False)]
+
+
+class ImportIndex:
+
+    def __init__(self, files, import_relations):
+        """
+        files:            every file that defines a chunk
+        import_relations: "import" relations (src_file, dst, language)
+        """
+        self._by_suffix = {}
+        self._by_dir_suffix = {}
+
+        for file_path in set(files):
+            parts = module_parts(file_path)
+
+            for i in range(len(parts)):
+                self._by_suffix.setdefault(parts[i:], set()).add(file_path)
+
+            dir_parts = PurePath(file_path).parent.parts
+            for i in range(len(dir_parts)):
+                self._by_dir_suffix.setdefault(dir_parts[i:], set()).add(file_path)
+
+        self._imports = {}
+        for rel in import_relations:
+            if rel.src_file:
+                self._imports.setdefault(rel.src_file, []).append((rel.dst, rel.language))
+
+        self._resolved = {}
+
+    def imported_files(self, file_path) -> set:
+        """Repository files imported by `file_path`."""
+        found = self._resolved.get(file_path)
+
+        if found is None:
+            found = set()
+
+            for spec, language in self._imports.get(file_path, ()):
+                for parts, is_package in import_targets(spec, language):
+                    if not parts:
+                        continue
+                    index = self._by_dir_suffix if is_package else self._by_suffix
+                    found.update(index.get(parts, ()))
+
+            found.discard(file_path)
+            self._resolved[file_path] = found
+
+        return found
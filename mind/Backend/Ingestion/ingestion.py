@@ -1,73 +1,39 @@
 import git
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Iterable
 from dotenv import load_dotenv
-import pickle
 import hashlib
 import asyncio
-from concurrent.futures import ProcessPoolExecutor   # NEW
 import os                                             # NEW
 import time
+from collections import Counter
 from langchain_core.documents import Document
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_community.vectorstores import Chroma
 
-from .python_parser.parse_python_files import ast_parser
-from .python_parser.extract_python_calls import extract_python_calls
-
-from .java_parser.parse_java_files import java_ast_parser
-from .java_parser.extract_java_calls import extract_java_calls
-
-from .js_parser.parse_js_files import js_ast_parser
-from .js_parser.extract_js_calls import extract_js_calls
+from retrieval.resources import (
+    get_vectorstore,
+    get_chunk_store,
+    get_chroma_dir
+)
 
-from .graph_making import create_graph
+from .records import Chunk
+from .graph_making import create_graph, load_graph, patch_graph, graph_exists
 from .bridge import infer_frontend_backend_bridges
-
-load_dotenv()
-
-embeddings = HuggingFaceEmbeddings(
-    model_name="all-MiniLM-L6-v2",
-    model_kwargs={"device": "cpu"},
-    encode_kwargs={"batch_size": 32}
+from .embedding_stage import EmbeddingStage
+from .scheduler import run_tasks, default_worker_count
+from .parser_pool import init_parsers
+from .parse_worker import parse_file_worker
+from .file_discovery import iter_source_files, is_clean_file
+from .manifest import (
+    load_manifest,
+    save_manifest,
+    build_manifest,
+    update_manifest,
+    flatten_manifest,
+    manifest_api_usage
 )
+from .parse_cache import evict_parse_cache
 
-MAX_WORKERS = 2   # as you decided
-
-
-# =========================================================
-# Parallel worker
-# =========================================================
-def parse_file_worker(args):
-
-    language, file_path = args
-
-    try:
-
-        if language == "python":
-            chunks, tree = ast_parser(file_path)
-            relations = extract_python_calls(chunks, tree, str(file_path))
-            print("python processing:", file_path)
-
-        elif language == "java":
-            chunks, tree = java_ast_parser(file_path)
-            relations = extract_java_calls(chunks, tree, str(file_path))
-            print("java processing:", file_path)
-
-        elif language == "js":
-            chunks, tree = js_ast_parser(file_path)
-            relations = extract_js_calls(chunks, tree, str(file_path))
-            print("js processing:", file_path)
-
-        else:
-            return language, [], [], file_path
-
-        return language, chunks, relations, file_path
-
-    except Exception as e:
-        print("FAILED FILE:", file_path)
-        print("ERROR:", e)
-        return language, [], [], file_path
+load_dotenv()
 
 
 # =========================================================
@@ -81,10 +47,9 @@ def is_already_processed(git_url: str) -> bool:
     repo_hash = get_repo_hash(git_url)
 
     cache_file = Path(f"cache/{repo_hash}.done")
-    graph_file = Path(f"graphs/{repo_hash}.pkl")
-    chroma_dir = Path(f"RepoMind/db/chroma_db/{repo_hash}")
+    chroma_dir = get_chroma_dir(repo_hash)
     print("INGEST CHROMA PATH:", chroma_dir)
-    return cache_file.exists() and graph_file.exists() and chroma_dir.exists()
+    return cache_file.exists() and graph_exists(repo_hash) and chroma_dir.exists()
 
 
 def mark_as_processed(git_url: str):
@@ -114,60 +79,59 @@ async def clone_repo(git_url: str) -> Path:
     return clone_path
 
 
-# =========================================================
-# File filtering
-# =========================================================
-from pathlib import Path
-from typing import List
+def get_head_commit(repo_root: Path) -> str:
+    return git.Repo(repo_root).head.commit.hexsha
 
-def clean_files(path: Path) -> List[Path]:
 
-    IGNORED_DIRS = {
-        ".git", "venv", "__pycache__", "node_modules",
-        "dist", "build", ".cache",
-        "public", "assets", "static", ".next", "coverage", "out"
-    }
+def _fetch_changes_sync(repo_root: Path, last_commit: str):
+    """
+    Fetch the remote, move the working tree to the upstream head and
+    report which files changed since `last_commit`.
 
-    IGNORED_EXTENSIONS = {
-        ".png", ".jpg", ".jpeg", ".gif", ".svg",
-        ".mp3", ".mp4", ".wav",
-        ".pdf", ".zip", ".exe", ".bin",
-        ".env", ".lock", ".log", ".csv"
-    }
+    Returns (new_commit, changed_paths, deleted_paths) with paths
+    relative to the repository root.
+    """
+    repo = git.Repo(repo_root)
+    repo.remotes.origin.fetch()
 
-    IGNORED_FILES = {
-        ".gitignore", "__init__.py","package-lock.json", "package.json"
-    }
+    tracking = repo.active_branch.tracking_branch()
+    new_commit = tracking.commit if tracking else repo.head.commit
+
+    changed, deleted = set(), set()
+
+    if new_commit.hexsha != last_commit:
 
-    files = []
+        for diff in repo.commit(last_commit).diff(new_commit):
 
-    if path.is_dir():
+            if diff.change_type in ("D", "R"):
+                deleted.add(diff.a_path)
 
-        # skip hidden directories except .git
-        if path.name.startswith(".") and path.name != ".git":
-            return []
+            if diff.change_type != "D":
+                changed.add(diff.b_path)
 
-        if path.name in IGNORED_DIRS:
-            return []
+        repo.git.reset("--hard", new_commit.hexsha)
 
-        for child in path.iterdir():
-            files.extend(clean_files(child))
+    return new_commit.hexsha, changed, deleted - changed
 
-    elif path.is_file():
 
-        if (
-            path.name not in IGNORED_FILES
-            and path.suffix.lower() not in IGNORED_EXTENSIONS
-        ):
-            files.append(path)
+async def fetch_changes(repo_root: Path, last_commit: str):
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(
+        None, _fetch_changes_sync, repo_root, last_commit
+    )
+
 
-    return files
+# =========================================================
+# File filtering
+# =========================================================
+# Only these are parsed, so discovery never opens anything else
+PARSED_EXTENSIONS = {".py", ".java", ".js", ".jsx"}
 
 
 # =========================================================
 # Language separation
 # =========================================================
-def split_by_language(files: List[Path]):
+def split_by_language(files: Iterable[Path]):
     py, java, js = [], [], []
 
     for f in files:
@@ -202,6 +166,11 @@ def split_by_language(files: List[Path]):
             ):
                 js.append(f)
 
+    # Discovery yields in completion order; keep task order stable
+    py.sort()
+    java.sort()
+    js.sort()
+
     return py, java, js
 
 
@@ -209,7 +178,7 @@ def split_by_language(files: List[Path]):
 # Vector document creation
 # =========================================================
 def to_langchain_docs(
-    chunks: List[dict],
+    chunks: List[Chunk],
     repo_root: Path
 ) -> List[Document]:
 
@@ -218,17 +187,17 @@ def to_langchain_docs(
     for c in chunks:
         docs.append(
             Document(
-                page_content=c["code"],
+                page_content=c.code,
                 metadata={
-                    "chunk_id": f"{c['file_path']}::{c['name']}",
-                    "file": str(c["file_path"].relative_to(repo_root)),
-                    "title": c["name"],
-                    "type": c["type"],
-                    "language": c.get("language"),
-                    "params": ", ".join(c.get("params", [])),
-                    "start_line": c["start_line"],
-                    "end_line": c["end_line"],
-                    "hash": c["hash"],
+                    "chunk_id": f"{c.file_path}::{c.name}",
+                    "file": str(c.file_path.relative_to(repo_root)),
+                    "title": c.name,
+                    "type": c.type,
+                    "language": c.language,
+                    "params": ", ".join(c.params or []),
+                    "start_line": c.start_line,
+                    "end_line": c.end_line,
+                    "hash": c.hash,
                 },
             )
         )
@@ -236,15 +205,91 @@ def to_langchain_docs(
     return docs
 
 
+# =========================================================
+# Shared ingestion stages
+# =========================================================
+def build_parse_tasks(py_files, java_files, js_files):
+    tasks = []
+
+    for f in py_files:
+        tasks.append(("python", f))
+
+    for f in java_files:
+        tasks.append(("java", f))
+
+    for f in js_files:
+        tasks.append(("js", f))
+
+    return tasks
+
+
+def parse_files(tasks, on_result=None):
+    """
+    Parse files on the warm worker pool, handing each result to
+    `on_result` as soon as it arrives.
+
+    The scheduler bounds outstanding work, so a slow consumer holds
+    back submission instead of buffering results. Results are in task
+    order, which keeps graph name resolution deterministic; the report
+    lists skipped files and the slowest ones.
+    """
+
+    workers = default_worker_count()
+
+    print(f"Parsing {len(tasks)} files in parallel with {workers} workers...")
+
+    start_time = time.time()
+
+    def on_parsed(result):
+        print("language parsed:", result[0], result[3])
+
+        if on_result:
+            on_result(result)
+
+    results, report = run_tasks(
+        parse_file_worker,
+        tasks,
+        on_parsed,
+        workers=workers,
+        initializer=init_parsers
+    )
+
+    # Skipped files still get an (empty) entry
+    for index, result in enumerate(results):
+        if result is None:
+            language, file_path = tasks[index]
+            results[index] = (language, [], [], file_path, ([], []))
+
+    print(f"✅ Parsing complete. Time taken: {time.time() - start_time:.2f} seconds")
+
+    for skipped in report["skipped"]:
+        print("SKIPPED FILE:", skipped["file"], skipped["reason"], skipped["seconds"])
+
+    for slow in report["slowest"][:3]:
+        print("slow file:", slow["file"], f"{slow['seconds']:.2f}s")
+
+    return results, report
+
+
 # =========================================================
 # 🚀 MAIN INGESTION ENTRY
 # =========================================================
-async def run_ingestion(git_url: str) -> Dict:
+async def run_ingestion(git_url: str, incremental: bool = False) -> Dict:
+    """
+    Ingest a repository. Once it has been ingested, the cached result
+    is returned, or with `incremental` the repository is brought up
+    to date with its remote (see run_incremental_ingestion).
+    """
 
     if is_already_processed(git_url):
 
         repo_name = git_url.split("/")[-1].replace(".git", "")
 
+        manifest = load_manifest(get_repo_hash(git_url)) if incremental else None
+
+        if manifest:
+            return await run_incremental_ingestion(git_url, manifest)
+
         return {
             "repository": repo_name,
             "cached": True,
@@ -260,119 +305,271 @@ async def run_ingestion(git_url: str) -> Dict:
 
     start_time = time.time()
 
-    files = clean_files(repo_root)
-
-    print(f"📄 Total files after cleaning: {len(files)}")
-    print("time taken for cleaning files:", time.time() - start_time)
-
-    print("splitting by language...")
+    # Discovery is drained here, before anything is scheduled: the
+    # scheduler needs every task up front to order work largest-first,
+    # and sorted per-language lists keep task (and so edge resolution)
+    # order deterministic
+    py_files, java_files, js_files = split_by_language(
+        iter_source_files(repo_root, PARSED_EXTENSIONS)
+    )
 
-    py_files, java_files, js_files = split_by_language(files)
+    print("time taken for discovering files:", time.time() - start_time)
 
     print("Python files:", len(py_files))
     print("Java files:", len(java_files))
     print("JS files:", len(js_files))
 
+    repo_hash = get_repo_hash(git_url)
+    chroma_dir = get_chroma_dir(repo_hash)
+
     all_chunks = []
     all_relations = []
 
     # ------------------------------------------------
     # Build unified parse tasks
     # ------------------------------------------------
-    tasks = []
-
-    for f in py_files:
-        tasks.append(("python", f))
-
-    for f in java_files:
-        tasks.append(("java", f))
+    tasks = build_parse_tasks(py_files, java_files, js_files)
 
-    for f in js_files:
-        tasks.append(("js", f))
+    # ------------------------------------------------
+    # Parse and embed concurrently: every parsed file
+    # streams its documents into the embedding stage
+    # ------------------------------------------------
+    embedding_stage = EmbeddingStage(
+        vectorstore=None if chroma_dir.exists() else get_vectorstore(repo_hash),
+        chunk_store=get_chunk_store(repo_hash, create=True)
+    ).start()
 
-    print(f"Parsing {len(tasks)} files in parallel with {MAX_WORKERS} workers...")
+    def on_parsed(result):
+        _, chunks, _, _, _ = result
+        embedding_stage.add(to_langchain_docs(chunks, repo_root))
 
     start_time = time.time()
-    results=[]
-    with ProcessPoolExecutor(max_workers=MAX_WORKERS) as executor:
 
-        try:
-            results = list(executor.map(parse_file_worker, tasks, chunksize=1))
-        except Exception as e:
+    results, parse_report = await asyncio.to_thread(parse_files, tasks, on_parsed)
+
+    # Walking the whole cache is only worth it after a full ingestion;
+    # incremental updates add a handful of entries at most
+    evicted = await asyncio.to_thread(evict_parse_cache)
+    if evicted:
+        print("Parse cache entries evicted:", evicted)
 
-            print("Worker error:", e)
-        
     # ------------------------------------------------
     # Process results
     # ------------------------------------------------
-    for language, chunks, relations, file_path in results:
-        print("language parsed:", language, file_path)
+    for language, chunks, relations, file_path, _ in results:
         all_chunks.extend(chunks)
         all_relations.extend(relations)
 
-    print(f"✅ Parsing complete. Time taken: {time.time() - start_time:.2f} seconds")
+    print("TOTAL CHUNKS:", len(all_chunks))
 
     # ------------------------------------------------
-    # Bridge inference
+    # Bridge inference and graph building run while the
+    # embedding stage drains its queue
     # ------------------------------------------------
+    def build_graph():
+
+        start_time = time.time()
+
+        print("Inferring cross-language bridges...")
+
+        bridge_edges = infer_frontend_backend_bridges(
+            all_chunks,
+            all_relations,
+            [result[4] for result in results]
+        )
+
+        all_relations.extend(bridge_edges)
+
+        print(f"✅ Bridge inference complete. Time taken: {time.time() - start_time:.2f}")
+
+        create_graph(all_chunks, all_relations, repo_hash)
+
+        return bridge_edges
+
+    print("Creating graph while embeddings finish...")
+
+    bridge_edges, _ = await asyncio.gather(
+        asyncio.to_thread(build_graph),
+        asyncio.to_thread(embedding_stage.finish)
+    )
+
+    print(f"✅ Graph and embeddings complete ({embedding_stage.documents} docs). "
+          f"Time taken: {time.time() - start_time:.2f}")
+
+    save_manifest(
+        repo_hash,
+        build_manifest(get_head_commit(repo_root), results, bridge_edges)
+    )
+
+    mark_as_processed(git_url)
+
+    print(f"✅ Ingestion complete for {repo_name}")
+
+    return {
+        "repository": repo_name,
+        "chunks": len(all_chunks),
+        "relations": len(all_relations),
+        "python_files": len(py_files),
+        "java_files": len(java_files),
+        "js_files": len(js_files),
+        "skipped_files": parse_report["skipped"],
+        "slowest_files": parse_report["slowest"],
+        "embedding_chunks_per_sec": round(embedding_stage.chunks_per_second(), 1),
+        "cached": False
+    }
+
+
+# =========================================================
+# 🔁 INCREMENTAL INGESTION
+# =========================================================
+async def run_incremental_ingestion(git_url: str, manifest: Dict) -> Dict:
+    """
+    Bring an already ingested repository up to date with its remote.
+
+    Only files touched since the last ingested commit are re-parsed;
+    Chroma documents are replaced by chunk hash and the graph is
+    patched in place instead of being rebuilt.
+    """
+
+    repo_hash = get_repo_hash(git_url)
+    repo_root = await clone_repo(git_url)
+    repo_name = repo_root.name
+
+    print(f"🔁 Incremental update for: {git_url}")
+
     start_time = time.time()
 
-    print("Inferring cross-language bridges...")
+    new_commit, changed, deleted = await fetch_changes(
+        repo_root,
+        manifest["commit"]
+    )
+
+    print(f"Changed files: {len(changed)}, deleted files: {len(deleted)}")
+    print("time taken for fetching changes:", time.time() - start_time)
+
+    if new_commit == manifest["commit"]:
+        return {
+            "repository": repo_name,
+            "cached": True,
+            "message": "Already up to date"
+        }
+
+    # ------------------------------------------------
+    # Re-parse changed files only
+    # ------------------------------------------------
+    candidates = [
+        repo_root / rel for rel in changed
+        if is_clean_file(repo_root, rel)
+    ]
+    py_files, java_files, js_files = split_by_language(candidates)
+
+    results, parse_report = await asyncio.to_thread(
+        parse_files,
+        build_parse_tasks(py_files, java_files, js_files)
+    )
+
+    touched_files = {str(repo_root / rel) for rel in changed | deleted}
+
+    old_chunks, old_relations = flatten_manifest(manifest)
+    old_relations = old_relations + manifest["bridges"]
+
+    old_file_chunks = [
+        c for path in touched_files
+        for c in manifest["files"].get(path, {}).get("chunks", [])
+    ]
+
+    new_manifest = update_manifest(manifest, new_commit, results, touched_files)
+
+    all_chunks, all_relations = flatten_manifest(new_manifest)
 
     bridge_edges = infer_frontend_backend_bridges(
         all_chunks,
-        all_relations
+        all_relations,
+        manifest_api_usage(new_manifest)
     )
-
+    new_manifest["bridges"] = bridge_edges
     all_relations.extend(bridge_edges)
 
-    print(f"✅ Bridge inference complete. Time taken: {time.time() - start_time:.2f}")
+    # ------------------------------------------------
+    # Replace affected Chroma documents by hash
+    # ------------------------------------------------
+    new_file_chunks = [c for c in all_chunks if str(c.file_path) in touched_files]
 
-    repo_hash = get_repo_hash(git_url)
+    old_counts = Counter(c.hash for c in old_file_chunks)
+    new_counts = Counter(c.hash for c in new_file_chunks)
 
-    docs = to_langchain_docs(all_chunks, repo_root)
-    print("TOTAL CHUNKS:", len(all_chunks))
-    print("DOCS CREATED:", len(docs))
-    chroma_dir = Path(f"RepoMind/db/chroma_db/{repo_hash}")
+    affected_hashes = {
+        h for h in old_counts.keys() | new_counts.keys()
+        if old_counts[h] != new_counts[h]
+    }
 
-    print("Creating graph and embeddings in parallel...")
+    # Deleting by hash removes every copy of that chunk, so re-add
+    # all of its occurrences, including ones in untouched files
+    readd_chunks = [c for c in all_chunks if c.hash in affected_hashes]
 
-    async def build_embeddings():
+    def update_embeddings():
 
-        if not chroma_dir.exists():
+        vectorstore = get_vectorstore(repo_hash)
+        hashes = list(affected_hashes)
 
-            vectorstore = Chroma(
-                embedding_function=embeddings,
-                persist_directory=str(chroma_dir),
-                collection_metadata={"hnsw:space": "cosine"},
+        for i in range(0, len(hashes), 500):
+            vectorstore._collection.delete(
+                where={"hash": {"$in": hashes[i:i + 500]}}
             )
 
-            batch_size = 100
+        chunk_store = get_chunk_store(repo_hash)
 
-            for i in range(0, len(docs), batch_size):
-                vectorstore.add_documents(docs[i:i + batch_size])
-
-            vectorstore.persist()
+        if chunk_store is None:
+            # Ingested before chunk stores existed: backfill everything
+            get_chunk_store(repo_hash, create=True).put_documents(
+                to_langchain_docs(all_chunks, repo_root)
+            )
+        else:
+            chunk_store.delete_hashes(hashes)
+
+        # Same stage (and embedding cache) as a full ingestion
+        embedding_stage = EmbeddingStage(
+            vectorstore=vectorstore,
+            chunk_store=chunk_store
+        ).start()
+
+        embedding_stage.add(to_langchain_docs(readd_chunks, repo_root))
+        embedding_stage.finish()
+
+    def update_graph():
+
+        patch_graph(
+            load_graph(repo_hash),
+            old_chunks,
+            old_relations,
+            all_chunks,
+            all_relations,
+            touched_files,
+            repo_hash
+        )
 
     start_time = time.time()
 
     await asyncio.gather(
-        asyncio.to_thread(create_graph, all_chunks, all_relations, repo_hash),
-        asyncio.to_thread(lambda: asyncio.run(build_embeddings()))
+        asyncio.to_thread(update_graph),
+        asyncio.to_thread(update_embeddings)
     )
 
-    print(f"✅ Graph and embeddings complete. Time taken: {time.time() - start_time:.2f}")
+    print(f"✅ Graph patched and {len(affected_hashes)} chunk hashes re-embedded. "
+          f"Time taken: {time.time() - start_time:.2f}")
 
-    mark_as_processed(git_url)
+    save_manifest(repo_hash, new_manifest)
 
-    print(f"✅ Ingestion complete for {repo_name}")
+    mark_as_processed(git_url)
 
     return {
         "repository": repo_name,
         "chunks": len(all_chunks),
         "relations": len(all_relations),
-        "python_files": len(py_files),
-        "java_files": len(java_files),
-        "js_files": len(js_files),
-        "cached": False
-    }
\ No newline at end of file
+        "changed_files": len(changed),
+        "deleted_files": len(deleted),
+        "reembedded_chunks": len(readd_chunks),
+        "skipped_files": parse_report["skipped"],
+        "cached": False,
+        "incremental": True
+    }
@@ -3,6 +3,9 @@ import tree_sitter_java as tsjava
 from pathlib import Path
 from typing import List
 
+from ..records import Relation
+from ..scope_index import ScopeIndex
+
 
 def extract_java_calls(chunks, tree, file_name):
     relations = []
@@ -10,7 +13,10 @@ def extract_java_calls(chunks, tree, file_name):
     # Create a mapping of chunk names to chunks for easy access
     chunk_map = {}
     for chunk in chunks:
-        chunk_map[chunk["name"]] = chunk
+        chunk_map[chunk.name] = chunk
+
+    # Innermost chunk lookup by line
+    scopes = ScopeIndex(chunks)
 
     def extract_params(node):
         params = []
@@ -26,13 +32,14 @@ def extract_java_calls(chunks, tree, file_name):
     def walk(node):
         if node.type == "import_declaration":
             text = node.text.decode("utf-8")
-            relations.append({
-                "from": file_name,
-                "to": text.replace("import", "").replace(";", "").strip(),
-                "type": "import",
-                "language": "java",
-                "confidence": "explicit"
-            })
+            relations.append(Relation(
+                src=file_name,
+                dst=text.replace("import", "").replace(";", "").strip(),
+                type="import",
+                language="java",
+                confidence="explicit",
+                src_file=file_name
+            ))
 
         if node.type == "class_declaration":
             class_name = None
@@ -44,13 +51,14 @@ def extract_java_calls(chunks, tree, file_name):
                 if child.type == "superclass":
                     for g in child.children:
                         if g.type == "type_identifier":
-                            relations.append({
-                                "from": class_name,
-                                "to": g.text.decode("utf-8"),
-                                "type": "inherits",
-                                "language": "java",
-                                "confidence": "explicit"
-                            })
+                            relations.append(Relation(
+                                src=class_name,
+                                dst=g.text.decode("utf-8"),
+                                type="inherits",
+                                language="java",
+                                confidence="explicit",
+                                src_file=file_name
+                            ))
 
         if node.type in ("method_declaration", "constructor_declaration"):
             method_name = None
@@ -62,46 +70,51 @@ def extract_java_calls(chunks, tree, file_name):
             
             # Add parameters to the chunk metadata
             if method_name in chunk_map:
-                if "params" not in chunk_map[method_name]:
-                    chunk_map[method_name]["params"] = []
-                chunk_map[method_name]["params"].extend(params)
-
-            relations.append({
-                "from": method_name,
-                "to": method_name,
-                "type": "defines",
-                "language": "java",
-                "params": params,
-                "confidence": "explicit"
-            })
-
-            start = node.start_point[0] + 1
-
-            for chunk in chunks:
-                if chunk["start_line"] <= start <= chunk["end_line"]:
-                    caller = chunk["name"]
-                    for sub in node.children:
-                        if sub.type == "method_invocation":
-                            for c in sub.children:
-                                if c.type == "identifier":
-                                    relations.append({
-                                        "from": caller,
-                                        "to": c.text.decode("utf-8"),
-                                        "type": "call",
-                                        "language": "java",
-                                        "confidence": "syntactic"
-                                    })
+                if chunk_map[method_name].params is None:
+                    chunk_map[method_name].params = []
+                chunk_map[method_name].params.extend(params)
+
+            relations.append(Relation(
+                src=method_name,
+                dst=method_name,
+                type="defines",
+                language="java",
+                confidence="explicit",
+                params=params,
+                src_file=file_name
+            ))
+
+        # Invocations anywhere in a body belong to the innermost
+        # chunk around them (method, constructor or nested class)
+        if node.type == "method_invocation":
+            caller = scopes.innermost(node.start_point[0] + 1)
+
+            # Only the method name: in `repo.find(x)` the receiver
+            # `repo` is an identifier child too
+            callee = node.child_by_field_name("name")
+
+            if caller and callee is not None:
+                relations.append(Relation(
+                    src=caller.name,
+                    dst=callee.text.decode("utf-8"),
+                    type="call",
+                    language="java",
+                    confidence="syntactic",
+                    src_file=file_name,
+                    src_hash=caller.hash
+                ))
 
         if node.type == "object_creation_expression":
             for child in node.children:
                 if child.type == "type_identifier":
-                    relations.append({
-                        "from": file_name,
-                        "to": child.text.decode("utf-8"),
-                        "type": "instantiates",
-                        "language": "java",
-                        "confidence": "explicit"
-                    })
+                    relations.append(Relation(
+                        src=file_name,
+                        dst=child.text.decode("utf-8"),
+                        type="instantiates",
+                        language="java",
+                        confidence="explicit",
+                        src_file=file_name
+                    ))
 
         for child in node.children:
             walk(child)
@@ -1,14 +1,13 @@
-from tree_sitter import Language, Parser
-import tree_sitter_java as tsjava
-import tree_sitter_javascript as tsjs
 from pathlib import Path
 from typing import List
 import hashlib
 
+from ..records import Chunk
+from ..parser_pool import get_parser, line_span_code
+
 def compute_chunk_hash(code):
     return hashlib.sha1(code.encode()).hexdigest()
 
-JAVA_LANGUAGE = Language(tsjava.language())
 def java_ast_parser(file_path: Path):
     chunks = []
     seen_nodes = set()
@@ -16,8 +15,8 @@ def java_ast_parser(file_path: Path):
     with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
         source = f.read()
 
-    parser = Parser(JAVA_LANGUAGE)
-    tree = parser.parse(source.encode("utf-8"))
+    source_bytes = source.encode("utf-8")
+    tree = get_parser("java").parse(source_bytes)
     ANNOTATION_USAGE_NODES = {
         "annotation",
         "marker_annotation",
@@ -62,28 +61,28 @@ def java_ast_parser(file_path: Path):
                 if child.type in ("annotation", "marker_annotation"):
                     decorators.append(child.text.decode("utf-8"))
             
-            code = "\n".join(source.splitlines()[start - 1:end])
-            chunks.append({
-                "name": name,
-                "file_path": file_path,
-                "type": chunk_type,
-                "code": code,
-                "start_line": start,
-                "end_line": end,
-                "decorators": decorators,
-                "hash": compute_chunk_hash(code)  
-            })
+            code = line_span_code(source_bytes, node.start_byte, node.end_byte)
+            chunks.append(Chunk(
+                name=name,
+                file_path=file_path,
+                type=chunk_type,
+                code=code,
+                start_line=start,
+                end_line=end,
+                decorators=decorators,
+                hash=compute_chunk_hash(code)  
+            ))
         for child in node.children:
             walk(child)
     walk(tree.root_node)
     if not chunks:
-        chunks.append({
-            "name": file_path.stem,
-            "file_path": file_path,
-            "type": "module",
-            "code": source,
-            "start_line": 1,
-            "end_line": len(source.splitlines()),
-            "hash": compute_chunk_hash(source)
-        })
+        chunks.append(Chunk(
+            name=file_path.stem,
+            file_path=file_path,
+            type="module",
+            code=source,
+            start_line=1,
+            end_line=len(source.splitlines()),
+            hash=compute_chunk_hash(source)
+        ))
     return chunks,tree
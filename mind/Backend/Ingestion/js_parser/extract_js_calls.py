@@ -3,6 +3,9 @@ import tree_sitter_javascript as tsjs
 from pathlib import Path
 from typing import List
 
+from ..records import Relation
+from ..scope_index import ScopeIndex
+
 
 def extract_js_calls(chunks, tree, file_name):
     relations = []
@@ -10,13 +13,10 @@ def extract_js_calls(chunks, tree, file_name):
     # Create a mapping of chunk names to chunks for easy access
     chunk_map = {}
     for chunk in chunks:
-        chunk_map[chunk["name"]] = chunk
+        chunk_map[chunk.name] = chunk
 
-    # NEW: Build line → chunk map
-    line_map = {}
-    for chunk in chunks:
-        for line in range(chunk["start_line"], chunk["end_line"] + 1):
-            line_map[line] = chunk["name"]
+    # Innermost chunk lookup by line
+    scopes = ScopeIndex(chunks)
 
     def extract_params(node):
         params = []
@@ -36,13 +36,14 @@ def extract_js_calls(chunks, tree, file_name):
         start_line = node.start_point[0] + 1 if node.start_point else None
 
         if node.type == "import_statement":
-            relations.append({
-                "from": file_name,
-                "to": node.text.decode("utf-8"),
-                "type": "import",
-                "language": "javascript",
-                "confidence": "explicit"
-            })
+            relations.append(Relation(
+                src=file_name,
+                dst=node.text.decode("utf-8"),
+                type="import",
+                language="javascript",
+                confidence="explicit",
+                src_file=file_name
+            ))
 
         if node.type == "class_declaration":
 
@@ -59,42 +60,46 @@ def extract_js_calls(chunks, tree, file_name):
                             parent_class = g.text.decode("utf-8")
 
             if class_name and parent_class:
-                relations.append({
-                    "from": class_name,
-                    "to": parent_class,
-                    "type": "inherits",
-                    "language": "javascript",
-                    "confidence": "explicit"
-                })
-
-        # NEW: constant-time caller lookup
+                relations.append(Relation(
+                    src=class_name,
+                    dst=parent_class,
+                    type="inherits",
+                    language="javascript",
+                    confidence="explicit",
+                    src_file=file_name
+                ))
+
         caller = None
         if start_line:
-            caller = line_map.get(start_line)
+            caller = scopes.innermost(start_line)
 
         if caller:
 
             if node.type == "call_expression":
                 for child in node.children:
                     if child.type == "identifier":
-                        relations.append({
-                            "from": caller,
-                            "to": child.text.decode("utf-8"),
-                            "type": "call",
-                            "language": "javascript",
-                            "confidence": "syntactic"
-                        })
+                        relations.append(Relation(
+                            src=caller.name,
+                            dst=child.text.decode("utf-8"),
+                            type="call",
+                            language="javascript",
+                            confidence="syntactic",
+                            src_file=file_name,
+                            src_hash=caller.hash
+                        ))
 
             if node.type == "new_expression":
                 for child in node.children:
                     if child.type == "identifier":
-                        relations.append({
-                            "from": caller,
-                            "to": child.text.decode("utf-8"),
-                            "type": "instantiates",
-                            "language": "javascript",
-                            "confidence": "explicit"
-                        })
+                        relations.append(Relation(
+                            src=caller.name,
+                            dst=child.text.decode("utf-8"),
+                            type="instantiates",
+                            language="javascript",
+                            confidence="explicit",
+                            src_file=file_name,
+                            src_hash=caller.hash
+                        ))
 
         if node.type in (
             "function_declaration",
@@ -111,28 +116,30 @@ def extract_js_calls(chunks, tree, file_name):
             params = extract_params(node)
 
             if name and name in chunk_map:
-                if "params" not in chunk_map[name]:
-                    chunk_map[name]["params"] = []
-                chunk_map[name]["params"].extend(params)
+                if chunk_map[name].params is None:
+                    chunk_map[name].params = []
+                chunk_map[name].params.extend(params)
 
             if name:
                 for p in params:
-                    relations.append({
-                        "from": name,
-                        "to": p,
-                        "type": "parameter",
-                        "language": "javascript",
-                        "confidence": "explicit"
-                    })
+                    relations.append(Relation(
+                        src=name,
+                        dst=p,
+                        type="parameter",
+                        language="javascript",
+                        confidence="explicit",
+                        src_file=file_name
+                    ))
 
         if node.type == "decorator":
-            relations.append({
-                "from": file_name,
-                "to": node.text.decode("utf-8"),
-                "type": "decorated_by",
-                "language": "javascript",
-                "confidence": "explicit"
-            })
+            relations.append(Relation(
+                src=file_name,
+                dst=node.text.decode("utf-8"),
+                type="decorated_by",
+                language="javascript",
+                confidence="explicit",
+                src_file=file_name
+            ))
 
         for child in node.children:
             walk(child)
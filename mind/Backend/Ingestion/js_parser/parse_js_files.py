@@ -1,10 +1,9 @@
-from tree_sitter import Language, Parser
-import tree_sitter_javascript as tsjs
 from pathlib import Path
 import hashlib
 import re
 
-JS_LANGUAGE = Language(tsjs.language())
+from ..records import Chunk
+from ..parser_pool import get_parser, line_span_code
 
 API_PATTERNS = [
     "fetch(",
@@ -43,10 +42,8 @@ def js_ast_parser(file_path: Path):
     # ------------------------------------------------
     # HYBRID STEP 2: Build AST only if necessary
     # ------------------------------------------------
-    parser = Parser(JS_LANGUAGE)
-    tree = parser.parse(source.encode("utf-8"))
-
-    lines = source.splitlines()
+    source_bytes = source.encode("utf-8")
+    tree = get_parser("js").parse(source_bytes)
 
     def extract_identifier(node):
         for child in node.children:
@@ -86,7 +83,7 @@ def js_ast_parser(file_path: Path):
             start = node.start_point[0] + 1
             end = node.end_point[0] + 1
 
-            code = "\n".join(lines[start - 1:end])
+            code = line_span_code(source_bytes, node.start_byte, node.end_byte)
 
             # Only keep chunks related to API logic
             if not any(p in code for p in API_PATTERNS):
@@ -94,16 +91,16 @@ def js_ast_parser(file_path: Path):
 
             name = extract_identifier(node) or file_path.stem
 
-            chunks.append({
-                "name": name,
-                "file_path": file_path,
-                "type": "api_logic",
-                "code": code,
-                "start_line": start,
-                "end_line": end,
-                "decorators": [],
-                "hash": compute_chunk_hash(code)
-            })
+            chunks.append(Chunk(
+                name=name,
+                file_path=file_path,
+                type="api_logic",
+                code=code,
+                start_line=start,
+                end_line=end,
+                decorators=[],
+                hash=compute_chunk_hash(code)
+            ))
 
         for child in node.children:
             walk(child)
@@ -114,15 +111,15 @@ def js_ast_parser(file_path: Path):
     # Fallback if no specific chunk detected
     # ------------------------------------------------
     if not chunks:
-        chunks.append({
-            "name": file_path.stem,
-            "file_path": file_path,
-            "type": "module",
-            "code": source,
-            "start_line": 1,
-            "end_line": len(lines),
-            "decorators": [],
-            "hash": compute_chunk_hash(source)
-        })
+        chunks.append(Chunk(
+            name=file_path.stem,
+            file_path=file_path,
+            type="module",
+            code=source,
+            start_line=1,
+            end_line=len(source.splitlines()),
+            decorators=[],
+            hash=compute_chunk_hash(source)
+        ))
 
     return chunks, tree
\ No newline at end of file
@@ -0,0 +1,118 @@
+import pickle
+from pathlib import Path
+from typing import Dict, List
+
+from .records import Relation
+
+
+# =========================================================
+# Ingestion manifest
+#
+# Remembers the commit that was ingested and the parse results
+# of every file, so a later run only has to re-parse files that
+# changed since then. Manifests from another version are ignored,
+# which falls back to a full ingestion.
+# =========================================================
+MANIFEST_VERSION = 5
+
+# Parse task order of a full ingestion: languages in this order, each
+# sorted by path (see split_by_language / build_parse_tasks)
+LANGUAGE_ORDER = {"python": 0, "java": 1, "js": 2}
+
+
+def get_manifest_path(repo_hash: str) -> Path:
+    return Path("cache") / f"{repo_hash}.manifest.pkl"
+
+
+def load_manifest(repo_hash: str):
+    manifest_path = get_manifest_path(repo_hash)
+
+    if not manifest_path.exists():
+        return None
+
+    try:
+        with open(manifest_path, "rb") as f:
+            manifest = pickle.load(f)
+    except Exception as e:
+        print("Failed to load manifest:", e)
+        return None
+
+    if manifest.get("version") != MANIFEST_VERSION:
+        print("Ignoring manifest from another version:", manifest_path)
+        return None
+
+    return manifest
+
+
+def save_manifest(repo_hash: str, manifest: Dict):
+    manifest_path = get_manifest_path(repo_hash)
+    manifest_path.parent.mkdir(exist_ok=True)
+
+    tmp_path = manifest_path.with_suffix(".tmp")
+
+    with open(tmp_path, "wb") as f:
+        pickle.dump(manifest, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    tmp_path.replace(manifest_path)
+
+
+def build_manifest(commit: str, results, bridges: List[Relation]) -> Dict:
+    files = {}
+
+    for language, chunks, relations, file_path, api_usage in results:
+        files[str(file_path)] = {
+            "language": language,
+            "chunks": chunks,
+            "relations": relations,
+            "api_usage": api_usage,
+        }
+
+    return {
+        "version": MANIFEST_VERSION,
+        "commit": commit,
+        "files": files,
+        "bridges": bridges,
+    }
+
+
+def flatten_manifest(manifest: Dict):
+    all_chunks = []
+    all_relations = []
+
+    for entry in manifest["files"].values():
+        all_chunks.extend(entry["chunks"])
+        all_relations.extend(entry["relations"])
+
+    return all_chunks, all_relations
+
+
+def manifest_api_usage(manifest: Dict):
+    """Per-file (frontend_apis, backend_endpoints), in flatten_manifest order."""
+    return [entry["api_usage"] for entry in manifest["files"].values()]
+
+
+def _task_order(item):
+    path, entry = item
+    return LANGUAGE_ORDER.get(entry["language"], len(LANGUAGE_ORDER)), Path(path)
+
+
+def update_manifest(manifest: Dict, commit: str, results, touched_files) -> Dict:
+    """
+    Replace the entries of `touched_files` with fresh parse results.
+
+    Entries are put back in full-ingestion task order (see
+    LANGUAGE_ORDER): when several definitions match a call, edge
+    resolution picks the first one it saw, so the patched graph only
+    matches a rebuild if chunks and relations come in the same order.
+    Bridges are left empty for the caller to fill in.
+    """
+    files = {
+        path: entry for path, entry in manifest["files"].items()
+        if path not in touched_files
+    }
+    files.update(build_manifest(commit, results, [])["files"])
+
+    new_manifest = build_manifest(commit, [], [])
+    new_manifest["files"] = dict(sorted(files.items(), key=_task_order))
+
+    return new_manifest
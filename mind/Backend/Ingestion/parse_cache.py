@@ -0,0 +1,154 @@
+import os
+import pickle
+import hashlib
+from pathlib import Path
+
+
+# =========================================================
+# Content-addressed parse cache
+#
+# Entries are keyed on the git blob SHA of the file bytes, so a file
+# with identical contents (fork, vendored copy, another branch) is
+# only parsed once. The file stem is part of the key too: parsers
+# name module-level chunks and relation sources after it, so
+# alpha.py and beta.py with the same bytes do not share an entry.
+# Bump PARSE_CACHE_VERSION whenever the shape of chunks or relations
+# produced by the parsers changes.
+# =========================================================
+PARSE_CACHE_VERSION = 6
+
+PARSE_CACHE_DIR = Path(os.getenv("PARSE_CACHE_DIR", "cache/parse"))
+PARSE_CACHE_MAX_BYTES = int(os.getenv("PARSE_CACHE_MAX_BYTES", 1024 ** 3))
+
+
+def blob_sha(data: bytes) -> str:
+    """Same id git uses for a blob, so it can be taken from `git ls-files -s`."""
+    header = f"blob {len(data)}\0".encode()
+    return hashlib.sha1(header + data).hexdigest()
+
+
+def _entry_path(language: str, sha: str, file_path: Path) -> Path:
+    stem = Path(file_path).stem.encode("utf-8", "surrogateescape")
+    stem_key = hashlib.sha1(stem).hexdigest()[:12]
+
+    return (
+        PARSE_CACHE_DIR
+        / f"v{PARSE_CACHE_VERSION}"
+        / language
+        / sha[:2]
+        / f"{sha[2:]}-{stem_key}.pkl"
+    )
+
+
+def load_parse_result(language: str, sha: str, file_path: Path):
+    """
+    Return (chunks, relations) for a blob, rebound to `file_path`,
+    or None on a cache miss.
+    """
+    entry_path = _entry_path(language, sha, file_path)
+
+    try:
+        with open(entry_path, "rb") as f:
+            entry = pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError):
+        return None
+
+    # Mark as recently used for eviction
+    try:
+        os.utime(entry_path)
+    except OSError:
+        pass
+
+    old_name = entry["file"]
+    new_name = str(file_path)
+
+    chunks = entry["chunks"]
+    for chunk in chunks:
+        chunk.file_path = file_path
+
+    relations = entry["relations"]
+    if old_name != new_name:
+        for rel in relations:
+            if rel.src == old_name:
+                rel.src = new_name
+            if rel.src_file == old_name:
+                rel.src_file = new_name
+
+    return chunks, relations
+
+
+def store_parse_result(language: str, sha: str, file_path: Path, chunks, relations):
+    entry_path = _entry_path(language, sha, file_path)
+
+    try:
+        entry_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Write to a per-process temp file, then atomically swap in so
+        # concurrent workers never see a partial entry
+        tmp_path = entry_path.with_suffix(f".{os.getpid()}.tmp")
+
+        with open(tmp_path, "wb") as f:
+            pickle.dump(
+                {"file": str(file_path), "chunks": chunks, "relations": relations},
+                f,
+                protocol=pickle.HIGHEST_PROTOCOL
+            )
+
+        os.replace(tmp_path, entry_path)
+
+    except OSError as e:
+        print("Parse cache write failed:", file_path, e)
+
+
+def evict_parse_cache(max_bytes: int = PARSE_CACHE_MAX_BYTES) -> int:
+    """
+    Delete least recently used entries until the cache fits in
+    `max_bytes`. Older cache versions are always removed.
+
+    Returns the number of removed entries.
+    """
+    if not PARSE_CACHE_DIR.exists():
+        return 0
+
+    current = f"v{PARSE_CACHE_VERSION}"
+    entries = []
+    total = 0
+    removed = 0
+
+    for root, _, names in os.walk(PARSE_CACHE_DIR):
+        stale = Path(root).relative_to(PARSE_CACHE_DIR).parts[:1] != (current,)
+
+        for name in names:
+            path = os.path.join(root, name)
+
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+
+            if stale:
+                os.remove(path)
+                removed += 1
+                continue
+
+            entries.append((st.st_mtime, st.st_size, path))
+            total += st.st_size
+
+    if total <= max_bytes:
+        return removed
+
+    entries.sort()
+
+    for _, size, path in entries:
+        if total <= max_bytes:
+            break
+
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+
+        total -= size
+        removed += 1
+
+    return removed
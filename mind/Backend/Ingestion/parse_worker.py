@@ -0,0 +1,68 @@
+from pathlib import Path
+
+from .python_parser.python_visitor import parse_python_file
+
+from .java_parser.parse_java_files import java_ast_parser
+from .java_parser.extract_java_calls import extract_java_calls
+
+from .js_parser.parse_js_files import js_ast_parser
+from .js_parser.extract_js_calls import extract_js_calls
+
+from .bridge import detect_api_usage
+from .parse_cache import blob_sha, load_parse_result, store_parse_result
+
+
+# =========================================================
+# Parse worker
+#
+# Entry points for the spawned parse pool (see scheduler.run_tasks).
+# Every warm worker imports this module, so it only pulls in the
+# parsers and the parse cache: nothing from retrieval (embeddings,
+# Chroma) or the rest of the ingestion pipeline.
+# =========================================================
+def _parse_file(language, file_path):
+    """
+    Parse a single file. Files the parser skips (syntax errors, JS
+    without API usage) come back without a tree and have no relations.
+    """
+
+    if language == "python":
+        chunks, relations = parse_python_file(file_path)
+        print("python processing:", file_path)
+
+    elif language == "java":
+        chunks, tree = java_ast_parser(file_path)
+        relations = extract_java_calls(chunks, tree, str(file_path)) if tree else []
+        print("java processing:", file_path)
+
+    elif language == "js":
+        chunks, tree = js_ast_parser(file_path)
+        relations = extract_js_calls(chunks, tree, str(file_path)) if tree else []
+        print("js processing:", file_path)
+
+    else:
+        return [], []
+
+    return chunks, relations
+
+
+def parse_file_worker(args):
+    """
+    Parse one file, going through the parse cache. Errors propagate to
+    the scheduler, which records the file as skipped.
+    """
+
+    language, file_path = args
+
+    sha = blob_sha(Path(file_path).read_bytes())
+
+    cached = load_parse_result(language, sha, file_path)
+    if cached is not None:
+        chunks, relations = cached
+    else:
+        chunks, relations = _parse_file(language, file_path)
+        store_parse_result(language, sha, file_path, chunks, relations)
+
+    # Frontend API calls / backend endpoints are found here, in the
+    # workers, so the bridge phase only has to match them
+    return language, chunks, relations, file_path, detect_api_usage(chunks)
@@ -0,0 +1,66 @@
+import threading
+
+from tree_sitter import Language, Parser
+import tree_sitter_java as tsjava
+import tree_sitter_javascript as tsjs
+
+
+# =========================================================
+# Per-process tree-sitter parsers
+#
+# A Parser is built once per language per worker (by the pool
+# initializer) and reused for every file that worker parses. Parsers
+# are not thread-safe, so each thread gets its own.
+# =========================================================
+JAVA_LANGUAGE = Language(tsjava.language())
+JS_LANGUAGE = Language(tsjs.language())
+
+LANGUAGES = {
+    "java": JAVA_LANGUAGE,
+    "js": JS_LANGUAGE,
+}
+
+_local = threading.local()
+
+
+def get_parser(language: str) -> Parser:
+    parsers = getattr(_local, "parsers", None)
+
+    if parsers is None:
+        parsers = _local.parsers = {}
+
+    parser = parsers.get(language)
+
+    if parser is None:
+        parser = parsers[language] = Parser(LANGUAGES[language])
+
+    return parser
+
+
+def init_parsers():
+    """Executor initializer: build every parser before the first task."""
+    for language in LANGUAGES:
+        get_parser(language)
+
+
+# ---------------------------------------------------------
+# Source slicing
+# ---------------------------------------------------------
+def line_span_code(source_bytes: bytes, start_byte: int, end_byte: int) -> str:
+    """
+    Code of the full lines spanning [start_byte, end_byte), sliced from
+    the encoded source. Same text as joining the split lines, without
+    splitting the file.
+    """
+    begin = source_bytes.rfind(b"\n", 0, start_byte) + 1
+
+    end = source_bytes.find(b"\n", end_byte)
+    if end == -1:
+        end = len(source_bytes)
+
+    code = source_bytes[begin:end].decode("utf-8")
+
+    if "\r" in code:
+        code = code.replace("\r\n", "\n").rstrip("\r")
+
+    return code
@@ -0,0 +1,290 @@
+import ast
+import hashlib
+from pathlib import Path
+
+from ..records import Chunk, Relation
+
+DEF_NODES = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+
+
+def compute_chunk_hash(code: str):
+    return hashlib.sha1(code.encode()).hexdigest()
+
+
+# =========================================================
+# Single-pass Python visitor
+#
+# One iterative walk over the tree yields chunks and every relation
+# kind (imports, inheritance, calls, returns, params, decorators).
+# The enclosing chunk travels down with each node, so there is no
+# parent assignment pass and no line → chunk map.
+#
+# Output order matches the original multi-pass extractor (ast.walk
+# is breadth first): every record is keyed by (depth, preorder
+# index), which sorts preorder into breadth-first order. A file
+# without any def/class is one module chunk, so its calls are
+# attributed to the module.
+# =========================================================
+def get_chunk_type(node, parent):
+    if isinstance(node, ast.ClassDef):
+        return "class"
+
+    if isinstance(node, ast.AsyncFunctionDef):
+        if isinstance(parent, ast.ClassDef):
+            return "async_method"
+        return "async_function"
+
+    if isinstance(node, ast.FunctionDef):
+        if isinstance(parent, ast.ClassDef):
+
+            for decorator in node.decorator_list:
+                if isinstance(decorator, ast.Name):
+                    if decorator.id == "staticmethod":
+                        return "static_method"
+                    if decorator.id == "classmethod":
+                        return "class_method"
+
+            return "method"
+
+        return "function"
+
+    return "unknown"
+
+
+def extract_params(func_node):
+    params = []
+
+    for arg in func_node.args.args:
+        params.append(arg.arg)
+
+    if func_node.args.vararg:
+        params.append(f"*{func_node.args.vararg.arg}")
+
+    for arg in func_node.args.kwonlyargs:
+        params.append(arg.arg)
+
+    if func_node.args.kwarg:
+        params.append(f"**{func_node.args.kwarg.arg}")
+
+    return params
+
+
+def _target_name(node):
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        return node.attr
+    return ast.dump(node)
+
+
+def _relation(src, dst, rel_type, confidence, line=None, src_file=None, src_hash=None):
+    return Relation(
+        src, dst, rel_type, "python", confidence, line,
+        src_file=src_file, src_hash=src_hash
+    )
+
+
+def visit_python_tree(tree, lines, file_path, build_chunks=True):
+    """
+    Walk `tree` once. Returns (chunks, relations, function_params), where
+    function_params lists (name, params) for every function in
+    breadth-first order, for callers that attach params to existing
+    chunks themselves.
+    """
+    file_name = str(file_path)
+
+    chunks = []       # (key, chunk)
+    imports = []      # (key, [relations])
+    classes = []
+    calls = []
+    module_calls = []
+    functions = []
+    function_params = []
+
+    seq = 0
+
+    # (node, parent, depth, enclosing chunk name, enclosing chunk hash)
+    stack = [(tree, None, 0, None, None)]
+
+    while stack:
+        node, parent, depth, caller, caller_hash = stack.pop()
+        key = (depth, seq)
+        seq += 1
+
+        inner = caller
+        inner_hash = caller_hash
+
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            prefix = f"{node.module or ''}." if isinstance(node, ast.ImportFrom) else ""
+
+            imports.append((key, [
+                _relation(
+                    file_name, f"{prefix}{alias.name}",
+                    "import", "explicit", node.lineno,
+                    src_file=file_name
+                )
+                for alias in node.names
+            ]))
+
+        elif isinstance(node, DEF_NODES):
+            inner = node.name
+            inner_hash = None
+
+            if build_chunks:
+                start = node.lineno
+                end = node.end_lineno
+                code = "\n".join(lines[start - 1:end])
+                inner_hash = compute_chunk_hash(code)
+
+                chunks.append((key, Chunk(
+                    name=node.name,
+                    file_path=file_path,
+                    type=get_chunk_type(node, parent),
+                    code=code,
+                    start_line=start,
+                    end_line=end,
+                    decorators=[ast.unparse(d) for d in node.decorator_list],
+                    hash=inner_hash
+                )))
+
+            scope = {"src_file": file_name, "src_hash": inner_hash}
+
+            if isinstance(node, ast.ClassDef):
+                rels = [
+                    _relation(node.name, _target_name(base), "inherits", "syntactic", **scope)
+                    for base in node.bases
+                ]
+
+                for body_item in node.body:
+                    if isinstance(body_item, ast.FunctionDef) and body_item.name == "__init__":
+                        rels.extend(
+                            _relation(node.name, p, "parameter", "explicit", **scope)
+                            for p in extract_params(body_item)
+                        )
+
+                classes.append((key, rels))
+
+            else:
+                params = extract_params(node)
+                function_params.append((key, (node.name, params)))
+
+                rels = [
+                    _relation(node.name, p, "parameter", "explicit", **scope)
+                    for p in params
+                ]
+                rels.extend(
+                    _relation(node.name, _target_name(d), "decorated_by", "explicit", **scope)
+                    for d in node.decorator_list
+                )
+
+                functions.append((key, rels))
+
+        # Calls and returns belong to the innermost enclosing chunk; a
+        # def/class line itself belongs to the chunk it opens
+        if isinstance(node, (ast.Call, ast.Return)):
+            target = calls if inner is not None else module_calls
+            scope = {"src_file": file_name, "src_hash": inner_hash}
+
+            if isinstance(node, ast.Call):
+                rels = [
+                    _relation(
+                        inner, _target_name(node.func),
+                        "call", "syntactic", node.lineno, **scope
+                    )
+                ]
+
+                if isinstance(node.func, ast.Name):
+                    rels.append(_relation(
+                        inner, node.func.id,
+                        "instantiates", "heuristic", node.lineno, **scope
+                    ))
+
+                target.append((key, rels))
+
+            else:
+                target.append((key, [
+                    _relation(inner, "return", "returns", "explicit", node.lineno, **scope)
+                ]))
+
+        # -------------------------------------------------
+        # Children: decorators sit above the def line and stay
+        # in the enclosing chunk; everything else moves inside
+        # -------------------------------------------------
+        if isinstance(node, DEF_NODES) and node.decorator_list:
+            decorators = {id(d) for d in node.decorator_list}
+            children = [
+                (child, node, depth + 1)
+                + ((caller, caller_hash) if id(child) in decorators else (inner, inner_hash))
+                for child in ast.iter_child_nodes(node)
+            ]
+        else:
+            children = [
+                (child, node, depth + 1, inner, inner_hash)
+                for child in ast.iter_child_nodes(node)
+            ]
+
+        children.reverse()
+        stack.extend(children)
+
+    def ordered(records):
+        records.sort(key=lambda r: r[0])
+        return [value for _, value in records]
+
+    if not classes and not functions:
+        module = Path(file_name).stem
+        for _, rels in module_calls:
+            for rel in rels:
+                rel.src = module
+        calls = module_calls
+
+    relations = []
+    for group in (imports, classes, calls, functions):
+        for rels in ordered(group):
+            relations.extend(rels)
+
+    return ordered(chunks), relations, ordered(function_params)
+
+
+def attach_params(chunks, function_params):
+    """Merge function params into chunks by name (last chunk wins)."""
+    chunk_map = {chunk.name: chunk for chunk in chunks}
+
+    for name, params in function_params:
+        chunk = chunk_map.get(name)
+
+        if chunk is not None:
+            if chunk.params is None:
+                chunk.params = []
+            chunk.params.extend(params)
+
+
+def parse_python_file(file_path: Path):
+    """Chunks and relations for one Python file, in a single walk."""
+    try:
+        with open(file_path, "r", encoding="utf-8") as file:
+            file_content = file.read()
+
+        lines = file_content.splitlines()
+        tree = ast.parse(file_content)
+
+    except Exception as e:
+        print(f"Error parsing {file_path}: {e}")
+        return [], []
+
+    chunks, relations, function_params = visit_python_tree(tree, lines, file_path)
+
+    # fallback if no chunks
+    if not chunks:
+        chunks.append(Chunk(
+            name=file_path.stem,
+            file_path=file_path,
+            type="module",
+            code=file_content,
+            start_line=1,
+            end_line=len(lines),
+            hash=compute_chunk_hash(file_content)
+        ))
+
+    attach_params(chunks, function_params)
+
+    return chunks, relations
@@ -0,0 +1,215 @@
+import os
+import hashlib
+import heapq
+from array import array
+
+
+# =========================================================
+# Precomputed node stats
+#
+# Retrieval ranks entry points by how much of the graph they reach.
+# Counting that per query is a traversal per candidate; here it is
+# done once per ingestion and stored on the nodes:
+#
+#   reach       number of nodes reachable from the node (what
+#               len(nx.descendants(G, node)) returns)
+#   out_degree, in_degree
+#
+# Works on integer edge arrays, so graphs built in bulk never need a
+# networkx copy. Strongly connected components are collapsed first
+# (Tarjan, which numbers them sinks-first), then the component DAG is
+# walked in that order. Small graphs get exact bitsets (one bit per
+# original node). Those cost up to n²/2 bits on a chain-shaped graph,
+# so they are only tried up to REACH_EXACT_MAX_NODES and abandoned
+# once the bitsets outgrow REACH_EXACT_MAX_BYTES; otherwise each
+# component keeps a bottom-k sketch of hashed node ids and the count
+# is estimated from it, so memory stays linear.
+# =========================================================
+REACH_EXACT_MAX_NODES = int(os.getenv("REACH_EXACT_MAX_NODES", 20000))
+REACH_EXACT_MAX_BYTES = int(os.getenv("REACH_EXACT_MAX_BYTES", 16 * 1024 ** 2))
+REACH_SKETCH_SIZE = 64
+
+
+def _node_rank(node) -> float:
+    """Stable pseudo-random value in [0, 1) per node id."""
+    digest = hashlib.blake2b(str(node).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little") / 2 ** 64
+
+
+def _adjacency(n, src, dst):
+    """CSR successor lists: (offsets, targets)."""
+    offsets = array("I", [0] * (n + 1))
+    for u in src:
+        offsets[u + 1] += 1
+    for i in range(n):
+        offsets[i + 1] += offsets[i]
+
+    fill = array("I", offsets[:-1])
+    targets = array("I", [0] * len(src))
+    for u, v in zip(src, dst):
+        targets[fill[u]] = v
+        fill[u] += 1
+
+    return offsets, targets
+
+
+def strongly_connected(n, offsets, targets):
+    """
+    Component id per node. Ids are assigned sinks-first: every edge
+    between components goes from a higher id to a lower one.
+    """
+    index = [-1] * n
+    low = [0] * n
+    on_stack = [False] * n
+    comp = [-1] * n
+
+    stack = []
+    counter = 0
+    components = 0
+
+    for root in range(n):
+        if index[root] != -1:
+            continue
+
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = True
+
+        # (node, next edge to look at)
+        work = [(root, offsets[root])]
+
+        while work:
+            v, i = work[-1]
+
+            if i < offsets[v + 1]:
+                work[-1] = (v, i + 1)
+                w = targets[i]
+
+                if index[w] == -1:
+                    index[w] = low[w] = counter
+                    counter += 1
+                    stack.append(w)
+                    on_stack[w] = True
+                    work.append((w, offsets[w]))
+
+                elif on_stack[w] and index[w] < low[v]:
+                    low[v] = index[w]
+
+                continue
+
+            work.pop()
+
+            if work:
+                u = work[-1][0]
+                if low[v] < low[u]:
+                    low[u] = low[v]
+
+            if low[v] == index[v]:
+                while True:
+                    w = stack.pop()
+                    on_stack[w] = False
+                    comp[w] = components
+                    if w == v:
+                        break
+                components += 1
+
+    return comp, components
+
+
+def _exact_reach(members, successors):
+    """Exact counts, or None once the bitsets pass REACH_EXACT_MAX_BYTES."""
+    bits = []
+    reach = []
+    position = 0
+    held_bits = 0
+    max_bits = REACH_EXACT_MAX_BYTES * 8
+
+    for comp, nodes in enumerate(members):
+        size = len(nodes)
+
+        b = ((1 << size) - 1) << position
+        position += size
+
+        for succ in successors[comp]:
+            b |= bits[succ]
+
+        held_bits += b.bit_length()
+        if held_bits > max_bits:
+            return None
+
+        bits.append(b)
+        reach.append(b.bit_count() - 1)
+
+    return reach
+
+
+def _sketch_reach(members, successors, node_ids):
+    k = REACH_SKETCH_SIZE
+    total = len(node_ids)
+    sketches = []
+    reach = []
+
+    for comp, nodes in enumerate(members):
+        candidates = {_node_rank(node_ids[node]) for node in nodes}
+
+        for succ in successors[comp]:
+            candidates.update(sketches[succ])
+
+        sketch = heapq.nsmallest(k, candidates)
+        sketches.append(sketch)
+
+        if len(sketch) < k:
+            estimate = len(sketch)
+        else:
+            estimate = round((k - 1) / sketch[-1])
+
+        reach.append(min(max(estimate, 1), total) - 1)
+
+    return reach
+
+
+def reach_counts(node_ids, src, dst) -> list:
+    """Per node index: number of nodes reachable from it."""
+    n = len(node_ids)
+    if n == 0:
+        return []
+
+    offsets, targets = _adjacency(n, src, dst)
+    comp, components = strongly_connected(n, offsets, targets)
+
+    members = [[] for _ in range(components)]
+    for node in range(n):
+        members[comp[node]].append(node)
+
+    successors = [set() for _ in range(components)]
+    for u, v in zip(src, dst):
+        if comp[u] != comp[v]:
+            successors[comp[u]].add(comp[v])
+
+    comp_reach = None
+
+    if n <= REACH_EXACT_MAX_NODES:
+        comp_reach = _exact_reach(members, successors)
+
+    if comp_reach is None:
+        print("Reach sets too large for exact counts, estimating")
+        comp_reach = _sketch_reach(members, successors, node_ids)
+
+    return [comp_reach[comp[node]] for node in range(n)]
+
+
+def add_node_stats(node_ids, node_attrs, src, dst):
+    """Store reach and degree counts in each node's attribute dict."""
+    out_degree = [0] * len(node_ids)
+    in_degree = [0] * len(node_ids)
+
+    for u, v in zip(src, dst):
+        out_degree[u] += 1
+        in_degree[v] += 1
+
+    for i, reach in enumerate(reach_counts(node_ids, src, dst)):
+        attrs = node_attrs[i]
+        attrs["reach"] = reach
+        attrs["out_degree"] = out_degree[i]
+        attrs["in_degree"] = in_degree[i]
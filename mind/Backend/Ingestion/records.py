@@ -0,0 +1,142 @@
+import sys
+
+
+# =========================================================
+# Chunk and relation records
+#
+# Parsers produce millions of these on big repositories; they are
+# pickled back from the parse workers, stored in the parse cache and
+# the manifest, and held for the whole ingestion. Slotted classes
+# avoid a per-record dict, and pickling as a flat argument tuple
+# (trailing Nones dropped) avoids repeating field names. Names and
+# the small vocabularies (type, language, confidence) are interned,
+# so records share string objects and pickle memoizes them.
+# =========================================================
+def _intern(value):
+    return sys.intern(value) if type(value) is str else value
+
+
+def _trim(args):
+    end = len(args)
+    while end and args[end - 1] is None:
+        end -= 1
+    return args[:end]
+
+
+class Chunk:
+
+    __slots__ = (
+        "name",
+        "file_path",
+        "type",
+        "code",
+        "start_line",
+        "end_line",
+        "decorators",
+        "hash",
+        "params",
+        "language",
+    )
+
+    def __init__(
+        self,
+        name,
+        file_path,
+        type,
+        code,
+        start_line,
+        end_line,
+        decorators=None,
+        hash=None,
+        params=None,
+        language=None
+    ):
+        self.name = _intern(name)
+        self.file_path = file_path
+        self.type = _intern(type)
+        self.code = code
+        self.start_line = start_line
+        self.end_line = end_line
+        self.decorators = decorators
+        self.hash = hash
+        self.params = params           # filled in by the call extractors
+        self.language = _intern(language)
+
+    def _fields(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __reduce__(self):
+        return (Chunk, _trim(self._fields()))
+
+    def __eq__(self, other):
+        if not isinstance(other, Chunk):
+            return NotImplemented
+        return self._fields() == other._fields()
+
+    def __repr__(self):
+        return f"Chunk({self.name!r}, {str(self.file_path)!r}, {self.type!r}, {self.start_line}-{self.end_line})"
+
+
+class Relation:
+
+    __slots__ = (
+        "src",
+        "dst",
+        "type",
+        "language",
+        "confidence",
+        "line",
+        "params",
+        # Where the relation was found: file and enclosing chunk hash
+        "src_file",
+        "src_hash",
+        # Cross-language (bridge) edges only
+        "route",
+        "http_method",
+        "backend_method",
+        "api_type",
+    )
+
+    def __init__(
+        self,
+        src,
+        dst,
+        type,
+        language,
+        confidence,
+        line=None,
+        params=None,
+        src_file=None,
+        src_hash=None,
+        route=None,
+        http_method=None,
+        backend_method=None,
+        api_type=None
+    ):
+        self.src = _intern(src)
+        self.dst = _intern(dst)
+        self.type = _intern(type)
+        self.language = _intern(language)
+        self.confidence = _intern(confidence)
+        self.line = line
+        self.params = params
+        self.src_file = _intern(src_file)
+        self.src_hash = src_hash
+        self.route = route
+        self.http_method = _intern(http_method)
+        self.backend_method = _intern(backend_method)
+        self.api_type = _intern(api_type)
+
+    def _fields(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __reduce__(self):
+        return (Relation, _trim(self._fields()))
+
+    def __eq__(self, other):
+        if not isinstance(other, Relation):
+            return NotImplemented
+        return self._fields() == other._fields()
+
+    def __repr__(self):
+        return f"Relation({self.src!r} -{self.type}-> {self.dst!r})"
@@ -0,0 +1,474 @@
+import os
+import time
+import queue
+import signal
+import atexit
+import itertools
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+
+# =========================================================
+# Parse scheduling
+#
+# - pool size follows available cores and memory
+# - small files are grouped so one IPC round trip covers many files
+# - work is submitted largest first (LPT), which keeps one huge file
+#   from becoming the tail of the run
+# - the pool stays warm between ingestions; an initializer sets up
+#   per-process state (e.g. parsers) once per worker
+# - every file has a deadline and stuck workers are recycled
+# - one run owns the pool at a time: concurrent ingestions queue on
+#   _run_lock, since a run's watchdog reads the pool's start queue
+#   and may recycle (or resize) the pool under it
+# =========================================================
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", 0))                # 0 → auto
+PARSE_WORKER_MEMORY_MB = int(os.getenv("PARSE_WORKER_MEMORY_MB", 512))
+
+SMALL_FILE_BYTES = 32 * 1024
+BATCH_MAX_BYTES = 256 * 1024
+BATCH_MAX_FILES = 64
+
+# Batches queued per worker before results must be consumed
+MAX_IN_FLIGHT_PER_WORKER = 2
+
+# Seconds a single file may take before it is skipped
+PARSE_FILE_TIMEOUT = float(os.getenv("PARSE_FILE_TIMEOUT", 30))
+
+WATCHDOG_INTERVAL = 1.0
+SLOWEST_REPORTED = 10
+
+
+def _available_cores() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def _available_memory_bytes():
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def default_worker_count() -> int:
+    if PARSE_WORKERS > 0:
+        return PARSE_WORKERS
+
+    # Leave a core for the main process and the embedding stage
+    workers = max(1, _available_cores() - 1)
+
+    memory = _available_memory_bytes()
+    if memory:
+        workers = min(workers, max(1, memory // (PARSE_WORKER_MEMORY_MB * 1024 ** 2)))
+
+    return workers
+
+
+# ---------------------------------------------------------
+# Warm pool
+# ---------------------------------------------------------
+_pool = None
+_pool_workers = 0
+_pool_initializer = None
+_pool_started = None      # queue workers post batch ids on as they start them
+_pool_lock = threading.Lock()
+
+# Held for the whole of run_tasks
+_run_lock = threading.Lock()
+
+_batch_ids = itertools.count()
+
+# Set in each worker process
+_started = None
+
+
+def _init_worker(started, initializer):
+    global _started
+
+    _started = started
+
+    if initializer is not None:
+        initializer()
+
+
+def get_pool(workers: int, initializer=None) -> ProcessPoolExecutor:
+    global _pool, _pool_workers, _pool_initializer, _pool_started
+
+    with _pool_lock:
+        broken = _pool is not None and getattr(_pool, "_broken", False)
+
+        if (
+            _pool is None
+            or broken
+            or _pool_workers != workers
+            or _pool_initializer is not initializer
+        ):
+            if _pool is not None:
+                _pool.shutdown(wait=not broken, cancel_futures=True)
+
+            # Spawn, not fork: the pool can be (re)created while the
+            # embedding thread is running torch, and a forked copy of
+            # that process can deadlock (see embedding_workers)
+            context = multiprocessing.get_context("spawn")
+
+            _pool_started = context.Queue()
+            _pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=context,
+                initializer=_init_worker,
+                initargs=(_pool_started, initializer)
+            )
+            _pool_workers = workers
+            _pool_initializer = initializer
+
+        return _pool
+
+
+def started_batches() -> list:
+    """Batch ids workers have started since the last call."""
+    with _pool_lock:
+        started = _pool_started
+
+    ids = []
+
+    while started is not None:
+        try:
+            ids.append(started.get_nowait())
+        except queue.Empty:
+            break
+
+    return ids
+
+
+def shutdown_pool():
+    global _pool
+
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool = None
+
+
+atexit.register(shutdown_pool)
+
+
+# ---------------------------------------------------------
+# Batching
+# ---------------------------------------------------------
+def _file_size(path) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def plan_batches(tasks, size_of=_file_size):
+    """
+    Group (language, path) tasks into batches of task indices, largest
+    work first. Files above SMALL_FILE_BYTES get a batch of their own.
+    """
+    sized = sorted(
+        ((size_of(task[1]), index) for index, task in enumerate(tasks)),
+        reverse=True
+    )
+
+    batches = []
+    current, current_bytes = [], 0
+
+    for size, index in sized:
+        if size >= SMALL_FILE_BYTES:
+            batches.append((size, [index]))
+            continue
+
+        if current and (
+            current_bytes + size > BATCH_MAX_BYTES
+            or len(current) >= BATCH_MAX_FILES
+        ):
+            batches.append((current_bytes, current))
+            current, current_bytes = [], 0
+
+        current.append(index)
+        current_bytes += size
+
+    if current:
+        batches.append((current_bytes, current))
+
+    batches.sort(key=lambda b: b[0], reverse=True)
+
+    return [indices for _, indices in batches]
+
+
+# ---------------------------------------------------------
+# Per-file deadlines (inside the worker)
+# ---------------------------------------------------------
+class ParseTimeout(BaseException):
+    """
+    Raised by SIGALRM when a file exceeds its deadline. Derives from
+    BaseException so parsers' own `except Exception` blocks cannot
+    swallow it.
+    """
+
+
+_deadline_armed = False
+
+
+def _on_alarm(signum, frame):
+    if _deadline_armed:
+        raise ParseTimeout()
+
+
+def _run_batch(worker, batch, timeout, batch_id=None):
+    """
+    Run a batch inside a worker process. Returns, per task,
+    (index, result, seconds, error) where error is None on success.
+    """
+    global _deadline_armed
+
+    # Starts the parent's watchdog clock for this batch
+    if _started is not None and batch_id is not None:
+        _started.put(batch_id)
+
+    use_alarm = (
+        timeout > 0
+        and hasattr(signal, "setitimer")
+        and threading.current_thread() is threading.main_thread()
+    )
+
+    if use_alarm:
+        previous = signal.signal(signal.SIGALRM, _on_alarm)
+
+    out = []
+
+    try:
+        for index, task in batch:
+            start = time.perf_counter()
+            result, error = None, None
+
+            try:
+                if use_alarm:
+                    _deadline_armed = True
+                    signal.setitimer(signal.ITIMER_REAL, timeout)
+
+                result = worker(task)
+                _deadline_armed = False
+
+            except ParseTimeout:
+                error = "timeout"
+
+            except Exception as e:
+                error = f"error: {e}"
+
+            finally:
+                _deadline_armed = False
+                if use_alarm:
+                    signal.setitimer(signal.ITIMER_REAL, 0)
+
+            out.append((index, result, time.perf_counter() - start, error))
+
+    finally:
+        if use_alarm:
+            signal.signal(signal.SIGALRM, previous)
+
+    return out
+
+
+# ---------------------------------------------------------
+# Execution
+# ---------------------------------------------------------
+def recycle_pool():
+    """Kill the pool's workers outright (e.g. one is stuck in C code)."""
+    global _pool, _pool_started
+
+    with _pool_lock:
+        if _pool is None:
+            return
+
+        for process in list(getattr(_pool, "_processes", {}).values()):
+            process.terminate()
+
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+        # A worker killed mid-put can leave the queue unusable
+        _pool_started = None
+
+
+def run_tasks(
+    worker,
+    tasks,
+    on_result=None,
+    workers=None,
+    timeout=None,
+    initializer=None
+):
+    """
+    Run `worker(task)` for every task on the warm pool, calling
+    `on_result(result)` as results arrive. `initializer` runs once in
+    each worker process, including workers started after a recycle.
+
+    Each file gets `timeout` seconds inside the worker. A batch that
+    stays dispatched well past its budget (worker stuck outside Python)
+    gets its pool recycled. Batches lost to a crash or a recycle are
+    split into single files, and a single file that crashed is retried
+    once on its own, so one bad file cannot take its neighbours down
+    with it.
+
+    Returns (results, report): results are in task order with None for
+    skipped tasks; the report lists skipped files and the slowest ones.
+
+    Runs are serialized: a second caller waits for the first to finish.
+    """
+    with _run_lock:
+        return _run_tasks(worker, tasks, on_result, workers, timeout, initializer)
+
+
+def _run_tasks(worker, tasks, on_result, workers, timeout, initializer):
+    workers = workers or default_worker_count()
+    timeout = PARSE_FILE_TIMEOUT if timeout is None else timeout
+
+    results = [None] * len(tasks)
+    timings = []
+    skipped = []
+
+    pending = deque(plan_batches(tasks))
+    quarantine = deque()
+    retried = set()
+    in_flight = {}    # future → (indices, started_at)
+    by_batch = {}     # batch id → future, until the worker starts it
+
+    def skip(index, reason, seconds=None):
+        language, path = tasks[index]
+        skipped.append({
+            "file": str(path),
+            "language": language,
+            "reason": reason,
+            "seconds": round(seconds, 3) if seconds is not None else None
+        })
+
+    def submit(indices):
+        batch = [(i, tasks[i]) for i in indices]
+        batch_id = next(_batch_ids)
+        future = get_pool(workers, initializer).submit(
+            _run_batch, worker, batch, timeout, batch_id
+        )
+        in_flight[future] = (indices, None)
+        by_batch[batch_id] = future
+
+    def fill():
+        while pending and len(in_flight) < workers * MAX_IN_FLIGHT_PER_WORKER:
+            submit(pending.popleft())
+
+        # Crash suspects run alone once everything else is done, so a
+        # second crash can only be blamed on the file itself
+        if quarantine and not pending and not in_flight:
+            submit(quarantine.popleft())
+
+    def retry_or_skip(indices, reason, retry_single=True):
+        if len(indices) > 1:
+            pending.extendleft([i] for i in indices)
+        elif retry_single and indices[0] not in retried:
+            retried.add(indices[0])
+            quarantine.append(indices)
+        else:
+            skip(indices[0], reason)
+
+    fill()
+
+    while in_flight:
+        done, _ = wait(
+            in_flight,
+            timeout=WATCHDOG_INTERVAL,
+            return_when=FIRST_COMPLETED
+        )
+
+        for future in done:
+            indices, _ = in_flight.pop(future)
+
+            try:
+                batch_results = future.result()
+            except Exception as e:
+                print("Worker error:", [str(tasks[i][1]) for i in indices], e)
+                retry_or_skip(indices, f"crashed: {type(e).__name__}")
+                continue
+
+            for index, result, seconds, error in batch_results:
+                timings.append((seconds, index))
+
+                if error:
+                    skip(index, error, seconds)
+                    continue
+
+                results[index] = result
+
+                if on_result:
+                    on_result(result)
+
+        # -------------------------------------------------
+        # Watchdog: the clock for a batch starts when a worker
+        # reports picking it up (a "running" future may still
+        # be sitting in the executor's call queue)
+        # -------------------------------------------------
+        now = time.monotonic()
+        stuck = []
+
+        for batch_id in started_batches():
+            future = by_batch.pop(batch_id, None)
+
+            if future in in_flight and in_flight[future][1] is None:
+                in_flight[future] = (in_flight[future][0], now)
+
+        for future, (indices, started_at) in in_flight.items():
+            if started_at is None:
+                continue
+
+            if timeout > 0 and now - started_at > timeout * (len(indices) + 1):
+                stuck.append(future)
+
+        if stuck:
+            print("Recycling parse workers, stuck batches:", len(stuck))
+
+            survivors = [
+                indices for future, (indices, _) in in_flight.items()
+                if future not in stuck
+            ]
+
+            for future in stuck:
+                indices, _ = in_flight[future]
+                retry_or_skip(
+                    indices,
+                    "timeout (worker recycled)",
+                    retry_single=False
+                )
+
+            in_flight.clear()
+            by_batch.clear()
+            recycle_pool()
+
+            pending.extendleft(reversed(survivors))
+
+        fill()
+
+    timings.sort(reverse=True)
+
+    report = {
+        "skipped": skipped,
+        "slowest": [
+            {"file": str(tasks[i][1]), "seconds": round(sec, 3)}
+            for sec, i in timings[:SLOWEST_REPORTED]
+        ],
+    }
+
+    return results, report
@@ -0,0 +1,55 @@
+from bisect import bisect_right
+
+
+# =========================================================
+# Innermost-scope lookup
+#
+# Chunks from one file are nested or disjoint line ranges. They are
+# flattened once into sorted, non-overlapping segments, each owned by
+# the innermost chunk covering it, so finding the chunk that encloses
+# a line is a binary search. Size is O(chunks), not O(chunk lines).
+# =========================================================
+class ScopeIndex:
+
+    def __init__(self, chunks):
+        intervals = sorted(
+            (chunk.start_line, -chunk.end_line, order, chunk)
+            for order, chunk in enumerate(chunks)
+        )
+
+        self._starts = []
+        self._owners = []
+
+        # (end_line, chunk) of the ranges open at the sweep position;
+        # equal ranges keep the later chunk on top
+        stack = []
+
+        for start, neg_end, _, chunk in intervals:
+            self._close(stack, start)
+            self._emit(start, chunk)
+            stack.append((-neg_end, chunk))
+
+        self._close(stack, float("inf"))
+
+    def _emit(self, start, owner):
+        if self._starts and self._starts[-1] == start:
+            self._owners[-1] = owner
+        elif not self._owners or self._owners[-1] is not owner:
+            self._starts.append(start)
+            self._owners.append(owner)
+
+    def _close(self, stack, position):
+        """Pop every range that ends before `position`."""
+        while stack and stack[-1][0] < position:
+            end = stack.pop()[0]
+
+            # A child running past its parent closes the parent too
+            while stack and stack[-1][0] <= end:
+                stack.pop()
+
+            self._emit(end + 1, stack[-1][1] if stack else None)
+
+    def innermost(self, line):
+        """Innermost chunk covering `line`, or None."""
+        i = bisect_right(self._starts, line) - 1
+        return self._owners[i] if i >= 0 else None
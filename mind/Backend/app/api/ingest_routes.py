@@ -1,7 +1,6 @@
 from fastapi import APIRouter, BackgroundTasks, HTTPException
 from pathlib import Path
 import uuid
-import pickle
 
 from ..core.state import state
 from ..schemas.ingest import (
@@ -11,6 +10,7 @@ from ..schemas.ingest import (
     FileTreeNode
 )
 from Ingestion.ingestion import run_ingestion, clone_repo, get_repo_hash
+from retrieval.resources import invalidate_query_hits
 
 router = APIRouter()
 
@@ -36,16 +36,16 @@ def build_tree(path: Path) -> dict:
     }
 
 
-async def ingestion_task(repo_id: str, git_url: str):
+async def ingestion_task(repo_id: str, git_url: str, incremental: bool = False):
     try:
-        await run_ingestion(git_url)
+        await run_ingestion(git_url, incremental=incremental)
 
-        # Load repo specific graph
+        # Warm the graph cache, dropping any copy cached before this
+        # ingestion
         repo_hash = get_repo_hash(git_url)
-        graph_path = Path("graphs") / f"{repo_hash}.pkl"
-
-        with open(graph_path, "rb") as f:
-            state.graph = pickle.load(f)
+        state.invalidate_graph(repo_hash)
+        invalidate_query_hits(repo_hash)
+        state.get_graph(repo_hash)
 
         state.repos[repo_id]["status"] = "completed"
 
@@ -84,7 +84,12 @@ async def start_ingestion(payload: IngestRequest, background_tasks: BackgroundTa
     }
     
     # Run the full ingestion in the background
-    background_tasks.add_task(ingestion_task, repo_id, payload.git_url)
+    background_tasks.add_task(
+        ingestion_task,
+        repo_id,
+        payload.git_url,
+        payload.incremental
+    )
     
     return {
         "repo_id": repo_id,
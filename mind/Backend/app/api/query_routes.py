@@ -1,11 +1,10 @@
 from fastapi import APIRouter, HTTPException
-from pathlib import Path
-import pickle
 import hashlib
 
 from ..schemas.query import QueryRequest, QueryResponse, ChatHistoryResponse
 from ..core.state import state
 from retrieval.main import run
+from Ingestion.graph_making import graph_exists
 
 router = APIRouter()
 
@@ -16,25 +15,25 @@ def get_repo_hash(git_url: str) -> str:
 
 def load_graph_for_repo(git_url: str):
     repo_hash = get_repo_hash(git_url)
-    graph_path = Path(f"graphs/{repo_hash}.pkl")
 
-    if not graph_path.exists():
+    if not graph_exists(repo_hash):
         raise HTTPException(400, "Graph not found. Run ingestion first.")
 
-    with open(graph_path, "rb") as f:
-        state.graph = pickle.load(f)
+    # Returned rather than stored on `state`: handlers run concurrently
+    # in the threadpool, each on its own repository
+    return state.get_graph(repo_hash)
 
 
 @router.post("/", response_model=QueryResponse)
 def query(payload: QueryRequest):
 
     # Always load graph of the repo being queried
-    load_graph_for_repo(payload.repo_url)
+    graph = load_graph_for_repo(payload.repo_url)
 
     response = run(
         user_query=payload.query,
         frontend_section=payload.intent,
-        graph=state.graph,
+        graph=graph,
         hash=get_repo_hash(payload.repo_url)
     )
 
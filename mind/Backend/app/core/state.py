@@ -1,16 +1,89 @@
+import os
 import json
+import threading
+from collections import OrderedDict
 from pathlib import Path
 from typing import List, Dict, Any
 from datetime import datetime
 
+from Ingestion.compact_graph import CompactGraph
+from Ingestion.graph_making import (
+    open_graph,
+    graph_path_for,
+    legacy_graph_path_for
+)
+
+GRAPH_CACHE_MAX_BYTES = int(os.getenv("GRAPH_CACHE_MAX_BYTES", 512 * 1024 ** 2))
+
 
 class AppState:
     def __init__(self):
-        self.graph = None
         self.repos = {}  # repo_id → {status, tree}
         self.chat_history: List[Dict[str, Any]] = []
         self._load_history()
 
+        # repo_hash → (file stamp, footprint in bytes, graph), LRU order
+        self.graph_cache = OrderedDict()
+        self.graph_cache_bytes = 0
+        self._graph_lock = threading.Lock()
+
+    # -----------------------------------------------------
+    # Graph cache
+    # -----------------------------------------------------
+    def get_graph(self, repo_hash: str):
+        """
+        Return the repo graph, loading it only when it is not cached or
+        the file on disk changed since it was loaded.
+        """
+        graph_path = graph_path_for(repo_hash)
+        if not graph_path.exists():
+            graph_path = legacy_graph_path_for(repo_hash)
+
+        st = graph_path.stat()
+        stamp = (str(graph_path), st.st_mtime_ns, st.st_size)
+
+        with self._graph_lock:
+            cached = self.graph_cache.get(repo_hash)
+            if cached and cached[0] == stamp:
+                self.graph_cache.move_to_end(repo_hash)
+                return cached[2]
+
+        graph = open_graph(repo_hash)
+
+        # A mapped graph costs its file size; an unpickled DiGraph is
+        # several times larger than its pickle
+        if isinstance(graph, CompactGraph):
+            footprint = graph.nbytes()
+        else:
+            footprint = st.st_size * 4
+
+        with self._graph_lock:
+            self._drop_graph(repo_hash)
+
+            self.graph_cache[repo_hash] = (stamp, footprint, graph)
+            self.graph_cache_bytes += footprint
+
+            # Evict least recently used graphs, always keeping this one.
+            # Evicted graphs are not closed: a request may still be
+            # traversing them, and they are released once unreferenced.
+            while (
+                self.graph_cache_bytes > GRAPH_CACHE_MAX_BYTES
+                and len(self.graph_cache) > 1
+            ):
+                oldest = next(iter(self.graph_cache))
+                self._drop_graph(oldest)
+
+        return graph
+
+    def invalidate_graph(self, repo_hash: str):
+        with self._graph_lock:
+            self._drop_graph(repo_hash)
+
+    def _drop_graph(self, repo_hash: str):
+        cached = self.graph_cache.pop(repo_hash, None)
+        if cached:
+            self.graph_cache_bytes -= cached[1]
+
     def _load_history(self):
         history_file = Path("db/chat_history.json")
         if history_file.exists():
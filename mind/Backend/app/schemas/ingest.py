@@ -12,6 +12,11 @@ class FileTreeNode(BaseModel):
 class IngestRequest(BaseModel):
     git_url: str
 
+    # Already ingested repositories return the cached result unless
+    # this is set, in which case the clone is fetched and only files
+    # changed since the ingested commit are re-parsed
+    incremental: bool = False
+
 
 class IngestStartResponse(BaseModel):
     repo_id: str
@@ -6,6 +6,7 @@ from pathlib import Path
 from app.api.ingest_routes import router as ingest_router
 from app.api.query_routes import router as query_router
 from app.api.repository_routes import router as repository_router
+from retrieval.resources import close_all_vectorstores, close_all_chunk_stores
 
 app = FastAPI(title="RepoMind API", version="1.0")
 
@@ -28,4 +29,10 @@ app.mount("/artifacts", StaticFiles(directory="artifacts"), name="artifacts")
 # Include routers
 app.include_router(ingest_router, prefix="/ingest", tags=["Ingestion"])
 app.include_router(query_router, prefix="/query", tags=["Query"])
-app.include_router(repository_router, prefix="/api/repository", tags=["Repository"])
\ No newline at end of file
+app.include_router(repository_router, prefix="/api/repository", tags=["Repository"])
+
+
+@app.on_event("shutdown")
+def close_resources():
+    close_all_vectorstores()
+    close_all_chunk_stores()
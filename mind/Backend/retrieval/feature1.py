@@ -1,14 +1,13 @@
 from typing import List, Tuple
 import networkx as nx
 
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_community.vectorstores import Chroma
 from langchain_core.documents import Document
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.messages import HumanMessage
 
 from collections import deque
 
+from .resources import get_chunks, get_llm
+
 
 # =========================================================
 # Hybrid traversal (BFS + shallow helper DFS)
@@ -60,14 +59,6 @@ def fetch_chunks_by_id(
     if not chunk_ids:
         return []
 
-    embedding_model = HuggingFaceEmbeddings(
-        model_name="all-MiniLM-L6-v2"
-    )
-
-    vectorstore = Chroma(
-        persist_directory=f"RepoMind/db/chroma_db/{repo_hash}",
-        embedding_function=embedding_model
-    )
     print("FLOW NODES:", chunk_ids)
 
     valid_ids = [
@@ -78,23 +69,9 @@ def fetch_chunks_by_id(
     if not valid_ids:
         return []
 
-    results = vectorstore.get(
-        where={"hash": {"$in": valid_ids}}
-    )
-
-    docs = []
-    for content, metadata in zip(
-        results.get("documents", []),
-        results.get("metadatas", [])
-    ):
-        docs.append(
-            Document(
-                page_content=content,
-                metadata=metadata
-            )
-        )
+    docs = get_chunks(repo_hash, valid_ids)
 
-    print("DOCS FOUND:", len(results.get("documents", [])))    
+    print("DOCS FOUND:", len(docs))
 
     return docs
 
@@ -107,10 +84,7 @@ def send_to_llm(
     query: str
 ) -> str:
 
-    llm = ChatGoogleGenerativeAI(
-        model="gemini-3-flash-preview",
-        temperature=0
-    )
+    llm = get_llm()
 
     context = "\n\n".join(
         doc.page_content for doc in docs
@@ -2,12 +2,11 @@ from typing import List, Dict, Tuple
 from collections import deque
 import networkx as nx
 
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_community.vectorstores import Chroma
 from langchain_core.documents import Document
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.messages import HumanMessage
 
+from .resources import get_chunks, get_llm
+
 
 def extract_impact_subgraph(
     graph: nx.DiGraph,
@@ -93,32 +92,7 @@ def fetch_chunks_by_id(
     if not chunk_ids:
         return []
 
-    embedding_model = HuggingFaceEmbeddings(
-        model_name="all-MiniLM-L6-v2"
-    )
-
-    vectorstore = Chroma(
-        persist_directory=f"RepoMind/db/chroma_db/{repo_hash}",
-        embedding_function=embedding_model
-    )
-
-    results = vectorstore.get(
-        where={"hash": {"$in": chunk_ids}}
-    )
-
-    docs = []
-    for content, metadata in zip(
-        results.get("documents", []),
-        results.get("metadatas", [])
-    ):
-        docs.append(
-            Document(
-                page_content=content,
-                metadata=metadata
-            )
-        )
-
-    return docs
+    return get_chunks(repo_hash, chunk_ids)
 
 
 def send_to_llm_impact(
@@ -127,10 +101,7 @@ def send_to_llm_impact(
     impact_data: Dict
 ) -> str:
 
-    llm = ChatGoogleGenerativeAI(
-        model="gemini-3-flash-preview",
-        temperature=0
-    )
+    llm = get_llm()
 
     context = "\n\n".join(
         doc.page_content for doc in docs
@@ -0,0 +1,187 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+
+# =========================================================
+# Query normalization cache + fast path
+#
+# normalize_user_query costs an LLM round trip per question. Parsed
+# LLM results are kept in a small sqlite file keyed on (query text,
+# frontend section) for NORMALIZE_CACHE_TTL seconds. With
+# NORMALIZE_FAST_PATH=1, questions whose wording plainly matches the
+# section the user picked skip the LLM entirely; those results are
+# not rewritten and are marked "normalized": False.
+#
+# Bump NORMALIZE_PROMPT_VERSION whenever the normalization prompt
+# changes; older cached results are then ignored.
+# =========================================================
+NORMALIZE_CACHE_PATH = Path(os.getenv("NORMALIZE_CACHE_PATH", "cache/normalized_queries.sqlite"))
+NORMALIZE_CACHE_TTL = int(os.getenv("NORMALIZE_CACHE_TTL", 7 * 24 * 3600))   # 0 → off
+NORMALIZE_FAST_PATH = os.getenv("NORMALIZE_FAST_PATH", "0") == "1"   # opt-in
+NORMALIZE_PROMPT_VERSION = 1
+
+INTENTS = ("explanation", "impact_analysis", "call_flow")
+
+
+# ---------------------------------------------------------
+# Persistent cache
+# ---------------------------------------------------------
+_lock = threading.Lock()
+_conn = None
+
+
+def _connect():
+    global _conn
+
+    if _conn is None:
+        NORMALIZE_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+
+        _conn = sqlite3.connect(
+            NORMALIZE_CACHE_PATH,
+            check_same_thread=False,
+            timeout=30
+        )
+        _conn.execute(
+            "CREATE TABLE IF NOT EXISTS normalized "
+            "(key TEXT PRIMARY KEY, result TEXT, created REAL)"
+        )
+
+    return _conn
+
+
+def cache_key(user_query: str, frontend_section: str) -> str:
+    # Only whitespace is folded: casing can matter for symbol names
+    text = " ".join(user_query.split())
+    raw = f"{NORMALIZE_PROMPT_VERSION}\0{frontend_section}\0{text}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def get_cached(user_query: str, frontend_section: str) -> Optional[Dict]:
+    if NORMALIZE_CACHE_TTL <= 0:
+        return None
+
+    with _lock:
+        found = _connect().execute(
+            "SELECT result, created FROM normalized WHERE key = ?",
+            (cache_key(user_query, frontend_section),)
+        ).fetchone()
+
+    if found is None or time.time() - found[1] > NORMALIZE_CACHE_TTL:
+        return None
+
+    return json.loads(found[0])
+
+
+def put_cached(user_query: str, frontend_section: str, result: Dict):
+    if NORMALIZE_CACHE_TTL <= 0:
+        return
+
+    with _lock:
+        conn = _connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO normalized VALUES (?, ?, ?)",
+            (cache_key(user_query, frontend_section), json.dumps(result), time.time())
+        )
+        conn.execute(
+            "DELETE FROM normalized WHERE created < ?",
+            (time.time() - NORMALIZE_CACHE_TTL,)
+        )
+        conn.commit()
+
+
+# ---------------------------------------------------------
+# Keyword fast path
+# ---------------------------------------------------------
+INTENT_PATTERNS = {
+    "explanation": re.compile(
+        r"\b(explain|describe|overview|purpose|what does|what is|what are|"
+        r"how does|how do|how is|understand|walk me through)\b"
+    ),
+    "impact_analysis": re.compile(
+        r"\b(impact|affect(s|ed)?|break(s)?|side effects?|depend(s|ent|ents)? on|"
+        r"what happens if|if i (change|modify|remove|delete|rename)|"
+        r"safe to (change|modify|remove|delete|rename))\b"
+    ),
+    "call_flow": re.compile(
+        r"\b(call flow|call graph|call chain|who calls|calls? into|invoked|"
+        r"execution (path|flow)|trace|sequence|flow of|request flow)\b"
+    ),
+}
+
+# Identifier-looking tokens: foo_bar, fooBar, FooBar, foo(), a.b
+SYMBOL_PATTERN = re.compile(
+    r"`([^`]+)`"
+    r"|\b([A-Za-z_][A-Za-z0-9_]*(?:\.[A-Za-z_][A-Za-z0-9_]*)+)\b"
+    r"|\b([A-Za-z_][A-Za-z0-9_]*)\(\)"
+    r"|\b([a-z][a-z0-9]*_[a-z0-9_]+|[a-z]+[A-Z][A-Za-z0-9]*|[A-Z][a-z0-9]+[A-Z][A-Za-z0-9]*)\b"
+)
+
+
+def classify_intent(user_query: str):
+    """
+    (intent, confidence) from keywords alone, or (None, 0.0) unless
+    exactly one intent matches. Confidence grows with the number of
+    distinct cue phrases found: 1 → 0.5, 2 → 0.67, 3 → 0.75, ...
+    """
+    text = " ".join(user_query.lower().split())
+
+    hits = {}
+    for intent, pattern in INTENT_PATTERNS.items():
+        cues = {m.group(0) for m in pattern.finditer(text)}
+        if cues:
+            hits[intent] = len(cues)
+
+    if len(hits) != 1:
+        return None, 0.0
+
+    intent, count = hits.popitem()
+    return intent, round(count / (count + 1), 2)
+
+
+def extract_symbols(user_query: str):
+    symbols = []
+
+    for match in SYMBOL_PATTERN.finditer(user_query):
+        symbol = next(group for group in match.groups() if group)
+        if symbol not in symbols:
+            symbols.append(symbol)
+
+    return symbols
+
+
+def fast_normalize(user_query: str, frontend_section: str) -> Optional[Dict]:
+    """
+    Intent and entities without the LLM, when NORMALIZE_FAST_PATH is
+    on, the wording matches exactly one intent and that intent is the
+    section the user picked. The question is passed through unchanged
+    (not rewritten), so the result is marked "normalized": False.
+    """
+    if not NORMALIZE_FAST_PATH or frontend_section not in INTENTS:
+        return None
+
+    intent, confidence = classify_intent(user_query)
+
+    if intent != frontend_section:
+        return None
+
+    symbols = extract_symbols(user_query)
+
+    return {
+        "primary_intent": intent,
+        "secondary_intents": [],
+        "queries": {
+            intent: user_query
+        },
+        "symbol_entities": symbols,
+        "concept_entities": [],
+        "needs_semantic_discovery": not symbols,
+        "confidence": confidence,
+        "normalized": False
+    }
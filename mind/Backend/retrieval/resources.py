@@ -0,0 +1,381 @@
+import os
+import json
+import math
+import platform
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from typing import List
+
+from langchain_huggingface import HuggingFaceEmbeddings
+from langchain_community.vectorstores import Chroma
+from langchain_google_genai import ChatGoogleGenerativeAI
+from langchain_core.documents import Document
+
+from Ingestion.embedding_cache import CachedEmbeddings, EmbeddingStore
+from Ingestion.chunk_store import ChunkStore, get_chunk_store_path
+from Ingestion.graph_making import graph_path_for
+
+
+# =========================================================
+# Shared resource registry
+#
+# Every retrieval feature and the ingestion pipeline get their
+# embedding model, vectorstores and LLM client from here, so each
+# process loads the sentence-transformer once and keeps a bounded
+# pool of open Chroma collections.
+# =========================================================
+EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
+
+VECTORSTORE_POOL_SIZE = int(os.getenv("VECTORSTORE_POOL_SIZE", 10))
+
+QUERY_VECTOR_CACHE_SIZE = int(os.getenv("QUERY_VECTOR_CACHE_SIZE", 1024))
+QUERY_HITS_CACHE_SIZE = int(os.getenv("QUERY_HITS_CACHE_SIZE", 256))   # 0 → off
+
+# ---------------------------------------------------------
+# Embedding backends
+#
+# Same model, different runtimes: "torch" (default), "onnx" (ONNX
+# Runtime, fp32) or "onnx-int8" (dynamically quantized ONNX). Before a
+# non-default backend is used, its vectors for a fixed probe set are
+# compared with the torch vectors recorded in the embedding store;
+# below EMBEDDING_COMPAT_MIN_COSINE it falls back to torch, so existing
+# collections and cached vectors stay comparable.
+# ---------------------------------------------------------
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+EMBEDDING_COMPAT_MIN_COSINE = float(os.getenv("EMBEDDING_COMPAT_MIN_COSINE", 0.99))
+
+_INT8_FILE = (
+    "onnx/model_qint8_arm64.onnx"
+    if platform.machine().lower() in ("arm64", "aarch64")
+    else "onnx/model_quint8_avx2.onnx"
+)
+
+EMBEDDING_BACKENDS = {
+    "torch": {},
+    "onnx": {"backend": "onnx"},
+    "onnx-int8": {
+        "backend": "onnx",
+        "model_kwargs": {"file_name": os.getenv("EMBEDDING_ONNX_FILE", _INT8_FILE)},
+    },
+}
+
+PROBE_TEXTS = [
+    "def add(a, b):\n    return a + b",
+    "class UserService:\n    def get_user(self, user_id):\n        return self.repo.find(user_id)",
+    "public int size() { return items.length; }",
+    "const res = await fetch('/api/items', { method: 'POST' });",
+    "@app.get('/health')\ndef health():\n    return {'status': 'ok'}",
+    "How is the authentication token validated?",
+]
+
+
+def get_chroma_dir(repo_hash: str) -> Path:
+    return Path(f"RepoMind/db/chroma_db/{repo_hash}")
+
+
+def _load_embedding_backend(backend: str):
+    return HuggingFaceEmbeddings(
+        model_name=EMBEDDING_MODEL_NAME,
+        model_kwargs={"device": "cpu", **EMBEDDING_BACKENDS[backend]},
+        encode_kwargs={"batch_size": 32}
+    )
+
+
+def _cosine(a, b) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+def _reference_probe(store: EmbeddingStore, torch_model=None):
+    """Torch vectors for PROBE_TEXTS, computed once per store."""
+    recorded = store.get_meta("probe")
+
+    if recorded is not None:
+        return json.loads(recorded)
+
+    torch_model = torch_model or _load_embedding_backend("torch")
+    vectors = torch_model.embed_documents(PROBE_TEXTS)
+    store.set_meta("probe", json.dumps(vectors))
+
+    return vectors
+
+
+def _is_compatible(model, store: EmbeddingStore) -> bool:
+    reference = _reference_probe(store)
+    vectors = model.embed_documents(PROBE_TEXTS)
+
+    worst = min(_cosine(a, b) for a, b in zip(vectors, reference))
+    print(f"Embedding backend probe: min cosine to torch {worst:.4f}")
+
+    return worst >= EMBEDDING_COMPAT_MIN_COSINE
+
+
+@lru_cache(maxsize=1)
+def get_embedding_model():
+    # Documents go through the shared embedding store, so identical
+    # chunks are never encoded twice; queries go straight to the model
+    store = EmbeddingStore(EMBEDDING_MODEL_NAME)
+    backend = EMBEDDING_BACKEND
+    model = None
+
+    if backend not in EMBEDDING_BACKENDS:
+        print("Unknown EMBEDDING_BACKEND, using torch:", backend)
+        backend = "torch"
+
+    if backend != "torch":
+        try:
+            model = _load_embedding_backend(backend)
+
+            if not _is_compatible(model, store):
+                print(f"Embedding backend {backend} is not compatible, using torch")
+                model = None
+
+        except Exception as e:
+            print(f"Embedding backend {backend} unavailable, using torch:", e)
+            model = None
+
+    if model is None:
+        model = _load_embedding_backend("torch")
+
+        # Record the reference while the torch model is loaded anyway
+        _reference_probe(store, model)
+
+    return CachedEmbeddings(model, store)
+
+
+@lru_cache(maxsize=1)
+def get_llm():
+    return ChatGoogleGenerativeAI(
+        model="gemini-3-flash-preview",
+        temperature=0
+    )
+
+
+# ---------------------------------------------------------
+# Vectorstore pool
+#
+# Evicted handles are dropped, not closed: an embedding stage or a
+# query thread may still be using them, and they are released once
+# unreferenced (same as the graph cache in app/core/state.py).
+# close_vectorstore / close_all_vectorstores stop the Chroma client
+# and remove it from chromadb's per-directory system cache, so the
+# next get_vectorstore for that repository starts a fresh client.
+# ---------------------------------------------------------
+_vectorstores = OrderedDict()
+_vectorstores_lock = threading.Lock()
+
+
+def _close_chroma(vectorstore):
+    client = getattr(vectorstore, "_client", None)
+    if client is None:
+        return
+
+    try:
+        try:
+            from chromadb.api.shared_system_client import SharedSystemClient
+        except ImportError:
+            from chromadb.api.client import SharedSystemClient
+
+        client._system.stop()
+        SharedSystemClient._identifier_to_system.pop(
+            getattr(client, "_identifier", None), None
+        )
+
+    except Exception as e:
+        print("Closing Chroma client failed:", e)
+
+
+def get_vectorstore(repo_hash: str):
+    with _vectorstores_lock:
+        vectorstore = _vectorstores.get(repo_hash)
+
+        if vectorstore is not None:
+            _vectorstores.move_to_end(repo_hash)
+            return vectorstore
+
+        vectorstore = Chroma(
+            embedding_function=get_embedding_model(),
+            persist_directory=str(get_chroma_dir(repo_hash)),
+            collection_metadata={"hnsw:space": "cosine"},
+        )
+        _vectorstores[repo_hash] = vectorstore
+
+        while len(_vectorstores) > VECTORSTORE_POOL_SIZE:
+            _vectorstores.popitem(last=False)
+
+        return vectorstore
+
+
+def close_vectorstore(repo_hash: str):
+    """
+    Close the pooled collection for a repository. The next call to
+    get_vectorstore opens it again from disk.
+    """
+    with _vectorstores_lock:
+        vectorstore = _vectorstores.pop(repo_hash, None)
+
+    if vectorstore is not None:
+        _close_chroma(vectorstore)
+
+
+def close_all_vectorstores():
+    with _vectorstores_lock:
+        vectorstores = list(_vectorstores.values())
+        _vectorstores.clear()
+
+    for vectorstore in vectorstores:
+        _close_chroma(vectorstore)
+
+
+# ---------------------------------------------------------
+# Query cache
+#
+# Repeat questions skip the model forward pass: query vectors are
+# kept in an LRU keyed on the normalized text, and the top-k hits per
+# repository are kept too. The model is uncased and whitespace is not
+# a token, so lowercasing and collapsing spaces does not change the
+# vector. Hits are tied to the repository's graph file, which every
+# full or incremental ingestion rewrites, so a re-ingested repository
+# never serves stale hits.
+# ---------------------------------------------------------
+_query_vectors = OrderedDict()
+_query_hits = OrderedDict()
+_query_lock = threading.Lock()
+
+
+def normalize_query_text(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def _lru_get(cache, key):
+    with _query_lock:
+        value = cache.get(key)
+        if value is not None:
+            cache.move_to_end(key)
+        return value
+
+
+def _lru_put(cache, key, value, max_size):
+    if max_size <= 0:
+        return
+
+    with _query_lock:
+        cache[key] = value
+        cache.move_to_end(key)
+
+        while len(cache) > max_size:
+            cache.popitem(last=False)
+
+
+def embed_query(text: str) -> List[float]:
+    key = normalize_query_text(text)
+
+    vector = _lru_get(_query_vectors, key)
+    if vector is None:
+        vector = get_embedding_model().embed_query(key)
+        _lru_put(_query_vectors, key, vector, QUERY_VECTOR_CACHE_SIZE)
+
+    return vector
+
+
+def _repo_generation(repo_hash: str):
+    try:
+        return graph_path_for(repo_hash).stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+def similarity_search(repo_hash: str, query: str, k: int = 10) -> List[Document]:
+    """Top-k chunk documents for a query, served from cache on repeats."""
+    key = (repo_hash, normalize_query_text(query), k)
+    generation = _repo_generation(repo_hash)
+
+    cached = _lru_get(_query_hits, key)
+    if cached is not None and cached[0] == generation:
+        return list(cached[1])
+
+    docs = get_vectorstore(repo_hash).similarity_search_by_vector(
+        embed_query(query),
+        k=k
+    )
+
+    _lru_put(_query_hits, key, (generation, docs), QUERY_HITS_CACHE_SIZE)
+
+    return list(docs)
+
+
+def invalidate_query_hits(repo_hash: str):
+    with _query_lock:
+        for key in [k for k in _query_hits if k[0] == repo_hash]:
+            del _query_hits[key]
+
+
+# ---------------------------------------------------------
+# Chunk store pool (same LRU bound as the vectorstores; evicted
+# stores are dropped, not closed, for the same reason)
+# ---------------------------------------------------------
+_chunk_stores = OrderedDict()
+_chunk_stores_lock = threading.Lock()
+
+
+def get_chunk_store(repo_hash: str, create: bool = False):
+    """
+    Pooled chunk store for a repository, or None when the repository
+    was ingested before chunk stores existed (and `create` is False).
+    """
+    with _chunk_stores_lock:
+        store = _chunk_stores.get(repo_hash)
+
+        if store is not None:
+            _chunk_stores.move_to_end(repo_hash)
+            return store
+
+        path = get_chunk_store_path(repo_hash)
+
+        if not create and not path.exists():
+            return None
+
+        store = ChunkStore(path)
+        _chunk_stores[repo_hash] = store
+
+        while len(_chunk_stores) > VECTORSTORE_POOL_SIZE:
+            _chunk_stores.popitem(last=False)
+
+        return store
+
+
+def close_all_chunk_stores():
+    with _chunk_stores_lock:
+        stores = list(_chunk_stores.values())
+        _chunk_stores.clear()
+
+    for store in stores:
+        store.close()
+
+
+def get_chunks(repo_hash: str, hashes: List[str]) -> List[Document]:
+    """
+    Fetch chunk documents by hash, falling back to a Chroma metadata
+    filter for repositories without a chunk store.
+    """
+    if not hashes:
+        return []
+
+    store = get_chunk_store(repo_hash)
+    if store is not None:
+        return store.get_chunks(hashes)
+
+    results = get_vectorstore(repo_hash).get(
+        where={"hash": {"$in": hashes}}
+    )
+
+    return [
+        Document(page_content=content, metadata=metadata)
+        for content, metadata in zip(
+            results.get("documents", []),
+            results.get("metadatas", [])
+        )
+    ]
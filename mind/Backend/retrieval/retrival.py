@@ -1,42 +1,22 @@
 import json
 from typing import List, Dict
-from functools import lru_cache
 from dotenv import load_dotenv
 
 import networkx as nx
 from langchain_core.documents import Document
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_community.vectorstores import Chroma
-from langchain_google_genai import ChatGoogleGenerativeAI
-
-load_dotenv()
 
+from Ingestion.compact_graph import descendants
 
-# =========================================================
 # Shared / cached resources
-# =========================================================
-
-@lru_cache(maxsize=1)
-def get_embedding_model():
-    return HuggingFaceEmbeddings(
-        model_name="all-MiniLM-L6-v2"
-    )
-
-
-@lru_cache(maxsize=10)
-def get_vectorstore(repo_hash: str):
-    return Chroma(
-        persist_directory=f"RepoMind/db/chroma_db/{repo_hash}",
-        embedding_function=get_embedding_model()
-    )
-
+from .resources import (
+    get_vectorstore,
+    get_llm,
+    get_chroma_dir,
+    similarity_search
+)
+from .query_normalization import fast_normalize, get_cached, put_cached
 
-@lru_cache(maxsize=1)
-def get_llm():
-    return ChatGoogleGenerativeAI(
-        model="gemini-3-flash-preview",
-        temperature=0
-    )
+load_dotenv()
 
 
 # =========================================================
@@ -51,10 +31,11 @@ def semantic_entry_discovery(
 ) -> List[str]:
 
     vectorstore = get_vectorstore(repo_hash)
-    print("RETRIEVAL PATH:", f"RepoMind/db/chroma_db/{repo_hash}")
+    print("RETRIEVAL PATH:", get_chroma_dir(repo_hash))
     print("VECTORSTORE COUNT:", vectorstore._collection.count())
 
-    candidate_docs: List[Document] = vectorstore.similarity_search(
+    candidate_docs: List[Document] = similarity_search(
+        repo_hash,
         explanation_query,
         k=10
     )
@@ -72,9 +53,14 @@ def semantic_entry_discovery(
 
     scored = []
     for node in set(candidate_nodes):
-        out_degree = graph.out_degree(node)
-        in_degree = graph.in_degree(node)
-        reachable = len(nx.descendants(graph, node))
+        stats = graph.nodes[node]
+        out_degree = stats.get("out_degree", graph.out_degree(node))
+        in_degree = stats.get("in_degree", graph.in_degree(node))
+
+        # Precomputed at ingestion; graphs saved before that are traversed
+        reachable = stats.get("reach")
+        if reachable is None:
+            reachable = len(descendants(graph, node))
 
         score = (out_degree * 2) + reachable - in_degree
         scored.append((node, score))
@@ -92,6 +78,16 @@ def normalize_user_query(
     frontend_section: str
 ) -> Dict:
 
+    fast = fast_normalize(user_query, frontend_section)
+    if fast is not None:
+        print("Query normalized by keyword fast path")
+        return fast
+
+    cached = get_cached(user_query, frontend_section)
+    if cached is not None:
+        print("Query normalization cache hit")
+        return cached
+
     llm = get_llm()
 
     system_prompt = f"""
@@ -145,6 +141,9 @@ Return ONLY valid JSON:
                 parsed["primary_intent"]: user_query
             }
 
+        # Only real LLM answers are cached, never the fallback below
+        put_cached(user_query, frontend_section, parsed)
+
         return parsed
 
     except Exception:
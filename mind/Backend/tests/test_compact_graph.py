@@ -0,0 +1,77 @@
+import networkx as nx
+import pytest
+
+from Ingestion.compact_graph import load_compact_graph, write_compact_graph
+
+
+def _write(tmp_path, node_ids, node_attrs, edges):
+    path = tmp_path / "g.csr"
+    write_compact_graph(path, node_ids, node_attrs, edges)
+    return load_compact_graph(path)
+
+
+def test_round_trip_matches_networkx(tmp_path):
+    node_ids = ["c", "a", "b", "d"]
+    node_attrs = [
+        {"name": "c", "start_line": 3, "params": ["x", "y"]},
+        {"name": "a", "start_line": 1, "params": None},
+        {"name": "b", "start_line": None, "params": []},
+        {"name": "d"},
+    ]
+    edges = [
+        (1, 2, {"type": "call", "count": 2}),
+        (2, 0, {"type": "call", "count": 1}),
+        (0, 1, {"type": "inherits", "count": 1}),
+        (3, 0, {"type": "call", "count": 1}),
+    ]
+
+    G = _write(tmp_path, node_ids, node_attrs, edges)
+
+    expected = nx.DiGraph()
+    for node, attrs in zip(node_ids, node_attrs):
+        expected.add_node(node, **attrs)
+    for u, v, attrs in edges:
+        expected.add_edge(node_ids[u], node_ids[v], **attrs)
+
+    assert sorted(G) == sorted(expected)
+    assert G.number_of_edges() == expected.number_of_edges()
+
+    for node in expected:
+        assert set(G.successors(node)) == set(expected.successors(node))
+        assert set(G.predecessors(node)) == set(expected.predecessors(node))
+        assert G.out_degree(node) == expected.out_degree(node)
+        assert G.in_degree(node) == expected.in_degree(node)
+        assert G.descendants(node) == nx.descendants(expected, node)
+
+    assert G.nodes["c"]["params"] == ["x", "y"]
+    assert G.nodes["a"]["start_line"] == 1
+    assert G.get_edge_data("a", "b") == {"type": "call", "count": 2}
+
+    G.close()
+
+
+def test_mixed_column_is_written_as_strings(tmp_path):
+    G = _write(
+        tmp_path,
+        ["a", "b", "c"],
+        [{"line": 1}, {"line": "12"}, {"line": True}],
+        [(0, 1, {"weight": 1}), (1, 2, {"weight": "heavy"})]
+    )
+
+    assert G.nodes["a"]["line"] == "1"
+    assert G.nodes["b"]["line"] == "12"
+    assert G.get_edge_data("b", "c")["weight"] == "heavy"
+
+    G.close()
+
+
+def test_missing_node_raises_networkx_error(tmp_path):
+    G = _write(tmp_path, ["a", "b"], [{}, {}], [(0, 1, {})])
+
+    for method in (G.in_degree, G.out_degree, G.successors, G.predecessors):
+        with pytest.raises(nx.NetworkXError):
+            method("missing")
+
+    assert not G.has_edge("a", "missing")
+
+    G.close()
@@ -0,0 +1,140 @@
+from Ingestion.bridge import detect_api_usage, infer_frontend_backend_bridges
+from Ingestion.graph_making import create_graph, load_graph, patch_graph
+from Ingestion.manifest import build_manifest, flatten_manifest, manifest_api_usage, update_manifest
+from Ingestion.python_parser.python_visitor import parse_python_file
+
+
+FILES = {
+    "a.py": "def get():\n    return 1\n",
+    "m.py": "def get():\n    return 2\n",
+    "z.py": "def caller():\n    return get()\n",
+}
+
+
+def _parse(paths):
+    results = []
+
+    for path in sorted(paths):
+        chunks, relations = parse_python_file(path)
+        results.append(("python", chunks, relations, path, detect_api_usage(chunks)))
+
+    return results
+
+
+def _graph_inputs(manifest):
+    chunks, relations = flatten_manifest(manifest)
+    bridges = infer_frontend_backend_bridges(chunks, relations, manifest_api_usage(manifest))
+    return chunks, relations + bridges
+
+
+def _snapshot(G):
+    nodes = {n: dict(G.nodes[n]) for n in G.nodes}
+    edges = {(u, v, tuple(sorted(d.items()))) for u, v, d in G.edges(data=True)}
+    return nodes, edges
+
+
+def test_patched_graph_matches_full_rebuild(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    for name, source in FILES.items():
+        (repo / name).write_text(source)
+
+    manifest = build_manifest("c1", _parse(repo.iterdir()), [])
+    old_chunks, old_relations = _graph_inputs(manifest)
+    create_graph(old_chunks, old_relations, "patched")
+
+    # One-line edit in the file holding the first `get`
+    (repo / "a.py").write_text("def get():\n    return 3\n")
+    touched = {str(repo / "a.py")}
+
+    new_manifest = update_manifest(manifest, "c2", _parse([repo / "a.py"]), touched)
+    new_chunks, new_relations = _graph_inputs(new_manifest)
+
+    patch_graph(
+        load_graph("patched"),
+        old_chunks,
+        old_relations,
+        new_chunks,
+        new_relations,
+        touched,
+        "patched"
+    )
+
+    create_graph(new_chunks, new_relations, "rebuilt")
+
+    patched = load_graph("patched")
+    rebuilt = load_graph("rebuilt")
+
+    assert _snapshot(patched) == _snapshot(rebuilt)
+
+    # caller() still links to the get() a full ingestion picks (a.py)
+    a_get = next(c for c in new_chunks if c.name == "get" and c.file_path.name == "a.py")
+    caller = next(c for c in new_chunks if c.name == "caller")
+    assert patched.has_edge(caller.hash, a_get.hash)
+
+
+# Each step: {file name: new source, or None to delete it}
+STEPS = [
+    {"a.py": None},
+    {"b.py": "def get():\n    return 4\n\ndef other():\n    return get()\n"},
+    {
+        "m.py": "class Base:\n    def run(self):\n        return 1\n",
+        "z.py": "from m import Base\n\nclass Child(Base):\n    def go(self):\n        return self.run()\n",
+    },
+    {"m.py": "class Base:\n    pass\n", "b.py": None},
+]
+
+
+def test_patch_matches_rebuild_across_adds_and_deletes(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    for name, source in FILES.items():
+        (repo / name).write_text(source)
+
+    manifest = build_manifest("c0", _parse(repo.iterdir()), [])
+    chunks, relations = _graph_inputs(manifest)
+    create_graph(chunks, relations, "patched")
+
+    for step, changes in enumerate(STEPS, 1):
+        touched = set()
+        for name, source in changes.items():
+            path = repo / name
+            if source is None:
+                path.unlink()
+            else:
+                path.write_text(source)
+            touched.add(str(path))
+
+        present = [repo / name for name in changes if (repo / name).exists()]
+        manifest = update_manifest(manifest, f"c{step}", _parse(present), touched)
+        new_chunks, new_relations = _graph_inputs(manifest)
+
+        patch_graph(
+            load_graph("patched"),
+            chunks,
+            relations,
+            new_chunks,
+            new_relations,
+            touched,
+            "patched"
+        )
+        create_graph(new_chunks, new_relations, "rebuilt")
+
+        assert _snapshot(load_graph("patched")) == _snapshot(load_graph("rebuilt")), step
+
+        chunks, relations = new_chunks, new_relations
+
+
+def test_update_manifest_keeps_task_order(tmp_path):
+    paths = [tmp_path / name for name in ("b.py", "a.py", "c.py")]
+    for path in paths:
+        path.write_text("x = 1\n")
+
+    manifest = build_manifest("c1", _parse(paths), [])
+    updated = update_manifest(manifest, "c2", _parse([tmp_path / "a.py"]), {str(tmp_path / "a.py")})
+
+    assert list(updated["files"]) == [str(tmp_path / n) for n in ("a.py", "b.py", "c.py")]
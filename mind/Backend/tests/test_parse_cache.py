@@ -0,0 +1,72 @@
+from pathlib import Path
+
+from Ingestion import parse_cache
+from Ingestion.parse_cache import blob_sha, load_parse_result, store_parse_result
+from Ingestion.python_parser.python_visitor import parse_python_file
+
+
+# No functions or classes: the module chunk and the call sources are
+# named after the file stem
+SOURCE = """\
+import os
+
+print(os.getcwd())
+"""
+
+
+def _parse_through_cache(file_path: Path):
+    # Same lookup parse_file_worker makes
+    sha = blob_sha(file_path.read_bytes())
+
+    cached = load_parse_result("python", sha, file_path)
+    if cached is not None:
+        return cached
+
+    chunks, relations = parse_python_file(file_path)
+    store_parse_result("python", sha, file_path, chunks, relations)
+    return chunks, relations
+
+
+def test_identical_blobs_keep_their_own_names(tmp_path, monkeypatch):
+    monkeypatch.setattr(parse_cache, "PARSE_CACHE_DIR", tmp_path / "cache")
+
+    repo = tmp_path / "r"
+    repo.mkdir()
+    alpha = repo / "alpha.py"
+    beta = repo / "beta.py"
+    alpha.write_text(SOURCE)
+    beta.write_text(SOURCE)
+
+    _parse_through_cache(alpha)
+    chunks, relations = _parse_through_cache(beta)
+
+    assert {c.file_path for c in chunks} == {beta}
+    assert [c.name for c in chunks] == ["beta"]
+    assert "beta" in {r.src for r in relations}
+    assert "alpha" not in {r.src for r in relations}
+    assert {r.src_file for r in relations} == {str(beta)}
+
+    # A fresh parse of beta gives the same result
+    fresh_chunks, fresh_relations = parse_python_file(beta)
+    assert [c.name for c in chunks] == [c.name for c in fresh_chunks]
+    assert [(r.src, r.dst) for r in relations] == [(r.src, r.dst) for r in fresh_relations]
+
+
+def test_same_stem_elsewhere_is_served_from_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(parse_cache, "PARSE_CACHE_DIR", tmp_path / "cache")
+
+    first = tmp_path / "a" / "alpha.py"
+    second = tmp_path / "b" / "alpha.py"
+    for path in (first, second):
+        path.parent.mkdir()
+        path.write_text(SOURCE)
+
+    _parse_through_cache(first)
+
+    sha = blob_sha(second.read_bytes())
+    cached = load_parse_result("python", sha, second)
+
+    assert cached is not None
+    chunks, relations = cached
+    assert {c.file_path for c in chunks} == {second}
+    assert {r.src_file for r in relations} == {str(second)}
@@ -0,0 +1,87 @@
+import random
+
+import networkx as nx
+
+from Ingestion import reach
+from Ingestion.reach import _adjacency, add_node_stats, reach_counts, strongly_connected
+
+
+def _random_graph(n, m, seed):
+    rng = random.Random(seed)
+    edges = {(rng.randrange(n), rng.randrange(n)) for _ in range(m)}
+    src = [u for u, _ in sorted(edges)]
+    dst = [v for _, v in sorted(edges)]
+    return src, dst
+
+
+def _expected_reach(n, src, dst):
+    G = nx.DiGraph()
+    G.add_nodes_from(range(n))
+    G.add_edges_from(zip(src, dst))
+    return [len(nx.descendants(G, node)) for node in range(n)]
+
+
+def test_components_are_numbered_sinks_first():
+    # 0 → 1 → 2 → 0 is a cycle feeding 3 → 4; 5 is on its own
+    src = [0, 1, 2, 2, 3]
+    dst = [1, 2, 0, 3, 4]
+    n = 6
+
+    offsets, targets = _adjacency(n, src, dst)
+    comp, components = strongly_connected(n, offsets, targets)
+
+    assert components == 4
+    assert comp[0] == comp[1] == comp[2]
+    assert len({comp[0], comp[3], comp[4], comp[5]}) == 4
+
+    for u, v in zip(src, dst):
+        assert comp[u] >= comp[v]
+
+
+def test_exact_counts_match_networkx():
+    n = 300
+    src, dst = _random_graph(n, 450, seed=7)
+
+    assert reach_counts(list(range(n)), src, dst) == _expected_reach(n, src, dst)
+
+
+def test_bitset_budget_falls_back_to_sketches(monkeypatch):
+    monkeypatch.setattr(reach, "REACH_EXACT_MAX_BYTES", 0)
+
+    # Sketches stay exact while fewer than REACH_SKETCH_SIZE nodes are reachable
+    n = 40
+    src, dst = _random_graph(n, 60, seed=3)
+
+    assert reach_counts([f"n{i}" for i in range(n)], src, dst) == _expected_reach(n, src, dst)
+
+
+def test_sketch_estimates_large_reach(monkeypatch):
+    monkeypatch.setattr(reach, "REACH_EXACT_MAX_NODES", 0)
+
+    # Binary tree: the root reaches every other node
+    n = 2000
+    src = [(i - 1) // 2 for i in range(1, n)]
+    dst = list(range(1, n))
+
+    counts = reach_counts([f"n{i}" for i in range(n)], src, dst)
+    expected = _expected_reach(n, src, dst)
+
+    for node in (0, 1, 2):
+        assert abs(counts[node] - expected[node]) <= 0.35 * expected[node]
+    assert counts[0] <= n - 1
+
+    # Leaves (and anything below REACH_SKETCH_SIZE) are exact
+    for node in range(n // 2, n):
+        assert counts[node] == 0
+    assert counts[n // 2 - 1] == expected[n // 2 - 1]
+
+
+def test_node_stats_are_stored_on_attributes():
+    node_ids = ["a", "b", "c"]
+    node_attrs = [{}, {}, {}]
+
+    add_node_stats(node_ids, node_attrs, [0, 0, 1], [1, 2, 2])
+
+    assert node_attrs[0] == {"reach": 2, "out_degree": 2, "in_degree": 0}
+    assert node_attrs[1] == {"reach": 1, "out_degree": 1, "in_degree": 1}
+    assert node_attrs[2] == {"reach": 0, "out_degree": 0, "in_degree": 2}
@@ -0,0 +1,40 @@
+from Ingestion.bridge import RouteIndex
+
+
+ENDPOINTS = [
+    {"route": "/api/users"},
+    {"route": "/users/{id}"},
+    {"route": "/api/items/:item_id"},
+    {"route": "/health"},
+    {"route": "/v1/api/users"},
+]
+
+
+def _candidates(route):
+    return RouteIndex(ENDPOINTS).candidates(route)
+
+
+def test_exact_routes_match():
+    assert _candidates("/health") == [3]
+    assert _candidates("/API/Health/") == [3]
+
+
+def test_prefix_differences_match_both_ways():
+    # Frontend calls a suffix of the endpoint route
+    assert _candidates("/users") == [0, 4]
+
+    # Endpoint route is a suffix of the frontend call
+    assert _candidates("/v1/api/users") == [0, 4]
+    assert _candidates("https://host/api/users") == [0]
+
+
+def test_placeholders_match_each_other():
+    assert _candidates("/users/{userId}") == [1]
+    assert _candidates("/users/:uid") == [1]
+    assert _candidates("/api/items/{itemId}") == [2]
+
+
+def test_unrelated_routes_do_not_match():
+    assert _candidates("/users/42") == []
+    assert _candidates("/missing") == []
+    assert _candidates("/api/items") == []
@@ -0,0 +1,120 @@
+import os
+import signal
+import time
+
+import pytest
+
+from Ingestion import scheduler
+
+
+# Workers and initializers live at module level: the pool spawns its
+# processes, which import them from this module by name
+
+_initialized = False
+
+
+def _init():
+    global _initialized
+    _initialized = True
+
+
+def _work(task):
+    kind, name = task
+
+    if kind == "slow":
+        time.sleep(10)
+    elif kind == "error":
+        raise ValueError("bad input")
+    elif kind == "crash":
+        os._exit(1)
+    elif kind == "stuck":
+        # Stands in for a parser stuck in C code: the deadline alarm
+        # never reaches Python
+        signal.pthread_sigmask(signal.SIG_BLOCK, {signal.SIGALRM})
+        time.sleep(60)
+
+    return name, _initialized
+
+
+@pytest.fixture(autouse=True)
+def fresh_pool(monkeypatch):
+    monkeypatch.setattr(scheduler, "WATCHDOG_INTERVAL", 0.1)
+    scheduler.shutdown_pool()
+    yield
+    scheduler.shutdown_pool()
+
+
+def _run(tasks, timeout=0.5, workers=2):
+    return scheduler.run_tasks(
+        _work,
+        tasks,
+        workers=workers,
+        timeout=timeout,
+        initializer=_init
+    )
+
+
+def _skipped(report):
+    return {entry["file"]: entry["reason"] for entry in report["skipped"]}
+
+
+def test_results_come_back_in_task_order():
+    tasks = [("ok", f"f{i}") for i in range(30)]
+    seen = []
+
+    results, report = scheduler.run_tasks(
+        _work,
+        tasks,
+        on_result=seen.append,
+        workers=2,
+        timeout=5,
+        initializer=_init
+    )
+
+    assert results == [(f"f{i}", True) for i in range(30)]
+    assert sorted(seen) == sorted(results)
+    assert report["skipped"] == []
+
+
+def test_timeout_skips_only_the_slow_file():
+    tasks = [("ok", f"f{i}") for i in range(10)] + [("slow", "S"), ("error", "E")]
+
+    results, report = _run(tasks)
+
+    assert _skipped(report) == {"S": "timeout", "E": "error: bad input"}
+    assert results[:10] == [(f"f{i}", True) for i in range(10)]
+    assert results[10:] == [None, None]
+
+
+def test_crash_is_retried_alone_then_skipped():
+    tasks = [("ok", f"f{i}") for i in range(10)] + [("crash", "C")]
+
+    results, report = _run(tasks)
+
+    assert _skipped(report) == {"C": "crashed: BrokenProcessPool"}
+    assert results[:10] == [(f"f{i}", True) for i in range(10)]
+    assert results[10] is None
+
+
+def test_stuck_worker_is_recycled(tmp_path):
+    # Large enough for a batch of its own, so its budget is one file's
+    stuck = tmp_path / "stuck.py"
+    stuck.write_bytes(b"#" * scheduler.SMALL_FILE_BYTES)
+
+    tasks = [("stuck", str(stuck))] + [("ok", f"f{i}") for i in range(10)]
+
+    # One worker: the other batch queues behind the stuck one and has
+    # to be resubmitted to the replacement pool
+    start = time.monotonic()
+    results, report = _run(tasks, workers=1)
+
+    assert time.monotonic() - start < 10
+    assert _skipped(report) == {str(stuck): "timeout (worker recycled)"}
+
+    # The replacement workers ran the initializer too
+    assert results[1:] == [(f"f{i}", True) for i in range(10)]
+
+    # The replacement pool is usable by the next run
+    results, report = _run([("ok", "after")])
+
+    assert results == [("after", True)]
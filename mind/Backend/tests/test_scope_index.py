@@ -0,0 +1,87 @@
+import random
+
+from Ingestion.records import Chunk
+from Ingestion.scope_index import ScopeIndex
+
+
+def _chunk(name, start, end):
+    return Chunk(name, "f.py", "function", "", start, end)
+
+
+def _brute_force(chunks, line):
+    """Narrowest chunk covering `line`; the later chunk wins a tie."""
+    best = None
+
+    for order, chunk in enumerate(chunks):
+        if not chunk.start_line <= line <= chunk.end_line:
+            continue
+
+        key = (chunk.start_line, -chunk.end_line, order)
+        if best is None or key > best[0]:
+            best = (key, chunk)
+
+    return best[1] if best else None
+
+
+def test_nested_scopes():
+    cls = _chunk("Service", 1, 20)
+    run = _chunk("run", 3, 8)
+    inner = _chunk("inner", 5, 6)
+    stop = _chunk("stop", 10, 15)
+    helper = _chunk("helper", 25, 30)
+
+    index = ScopeIndex([helper, stop, inner, run, cls])
+
+    expected = {
+        0: None,
+        1: cls,
+        2: cls,
+        3: run,
+        4: run,
+        5: inner,
+        6: inner,
+        7: run,
+        8: run,
+        9: cls,
+        12: stop,
+        16: cls,
+        20: cls,
+        21: None,
+        25: helper,
+        30: helper,
+        31: None,
+    }
+
+    for line, chunk in expected.items():
+        assert index.innermost(line) is chunk, line
+
+
+def test_equal_ranges_keep_the_later_chunk():
+    first = _chunk("first", 1, 5)
+    second = _chunk("second", 1, 5)
+
+    index = ScopeIndex([first, second])
+
+    assert index.innermost(3) is second
+
+
+def test_matches_brute_force_on_nested_ranges():
+    rng = random.Random(11)
+    chunks = []
+
+    def nest(start, end, depth):
+        line = start
+        while line < end and depth < 4:
+            length = rng.randint(1, 12)
+            child_end = min(end, line + length)
+            chunks.append(_chunk(f"c{len(chunks)}", line, child_end))
+            nest(line + 1, child_end - 1, depth + 1)
+            line = child_end + rng.randint(1, 3)
+
+    nest(1, 200, 0)
+    rng.shuffle(chunks)
+
+    index = ScopeIndex(chunks)
+
+    for line in range(0, 205):
+        assert index.innermost(line) is _brute_force(chunks, line), line